@@ -1,72 +1,196 @@
-from flask import Flask, jsonify, send_file
-from flask_swagger_ui import get_swaggerui_blueprint
-from app.extensions import migrate, db
-from flask_sqlalchemy import SQLAlchemy
-
-from app.controllers.auth.auth_controller import auth
-from app.controllers.auth.book_controller import book_bp
-from app.controllers.auth.company_controller import company_bp
-from app.controllers.auth.revokedTokenController import revoked_tokens_bp
-
-from flask_jwt_extended import JWTManager
-from app.models.users import User
-from app.models.companies import Company
-from app.models.books import Book
 import os
 
-def create_app():  
+import click
+from flask import Flask
+from flask.cli import AppGroup
+from config import config_by_name
+
+
+def __getattr__(name):
+    # The models import `db` from here. Loading it on first use keeps `import app` light for
+    # processes that only need a helper module, such as the password hashing workers.
+    if name == 'db':
+        from app.extensions import db
+        return db
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_app(config_name=None):
+    # Extensions are imported here rather than at module level, and the HTTP API is only
+    # assembled for processes that serve it (see register_api)
+    from app.extensions import db, init_migrate
+    from app.db_pool import configure_pool
+    from app.replicas import replica_router
+    from app.json_provider import init_json
+    from app.search import search
+    from app.result_cache import result_cache
+    from app.jobs import job_queue
+    # Every table on db.metadata, for `flask db` and `flask schema check`
+    from app.models import books, companies, jobs, revoked_tokens, tombstones, users  # noqa: F401
+
     app = Flask(__name__)
 
-    # Load configuration from the Config class
-    app.config.from_object('config.Config')
-    
+    # Load configuration for the environment (development, testing or production)
+    config_name = config_name or os.environ.get('APP_ENV', 'development')
+    app.config.from_object(config_by_name[config_name])
+
+    # Use orjson for responses when it is installed
+    init_json(app)
+
     # Set the JWT secret key
     app.config['JWT_SECRET_KEY'] = 'jera256'
-   
-    # Initialize the Flask application with SQLAlchemy
+
+    # Only `flask run` and Flask's commands that inspect the app (routes, shell) load it in their
+    # own context. The app's commands (flask db, schema, jobs, purge-...) load it from the top-level
+    # `flask` group and don't need the blueprints, JWT or request hooks.
+    cli_context = click.get_current_context(silent=True)
+    if cli_context is None or cli_context.info_name in ('run', 'routes', 'shell'):
+        # Registered first so the rate limiter runs before the replica router's request hook
+        register_api(app)
+
+    # Initialize the Flask application with SQLAlchemy, using an instrumented connection pool
+    configure_pool(app)
+    replica_router.init_app(app)
     db.init_app(app)
-    
+
+    # Initialize Flask-Migrate for the CLI only (flask db ..., flask schema check);
+    # serving processes skip importing alembic
+    if cli_context is not None:
+        init_migrate(app)
+
+    # Initialize the book search index
+    search.init_app(app)
+
+    # Initialize the result cache behind the book and company read endpoints
+    result_cache.init_app(app)
+
+    # Database-backed queue for work that runs outside the request
+    job_queue.init_app(app)
+
+    # Create missing tables in development and testing only; production schemas are managed
+    # by `flask db upgrade`, so workers run no DDL and don't need the database to boot.
+    # Of the CLI commands only `flask run` serves requests; `flask db ...` must create the tables itself.
+    serving = cli_context is None or cli_context.info_name == 'run'
+    if app.config.get('SCHEMA_AUTO_CREATE', False) and serving:
+        with app.app_context():
+            db.create_all()
+
+    register_commands(app)
+
+    return app
+
+
+def register_api(app):
+    # Request hooks, JWT, blueprints and the OpenAPI document
+    from flask_jwt_extended import JWTManager
+    from flask_swagger_ui import get_swaggerui_blueprint
+    from app.blocklist import check_if_token_revoked
+    from app.user_cache import load_current_user
+    from app.rate_limit import rate_limiter
+    from app.metrics import metrics
+    from app.compression import compressor
+    from app.openapi import openapi
+    from app.controllers.auth.auth_controller import auth
+    from app.controllers.auth.book_controller import book_bp
+    from app.controllers.auth.company_controller import company_bp
+    from app.controllers.auth.revokedTokenController import revoked_tokens_bp
+    from app.controllers.auth.health_controller import health_bp
+    from app.controllers.auth.job_controller import jobs_bp
+    from app.controllers.auth.metrics_controller import metrics_bp
+
+    # Throttle requests before any other request hook touches the database
+    rate_limiter.init_app(app)
+
+    # Per-endpoint latency, status and SQL metrics, served at /metrics
+    metrics.init_app(app)
+
+    # gzip/brotli for buffered text responses above COMPRESS_MIN_SIZE
+    compressor.init_app(app)
+
     # Initialize JWTManager
     jwt = JWTManager(app)
 
-    # Initialize Flask-Migrate for handling database migrations
-    migrate.init_app(app, db)
+    # Reject revoked tokens; answered from an in-process cache in front of revoked_tokens
+    jwt.token_in_blocklist_loader(check_if_token_revoked)
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        # Bind metadata to the database engine
-        db.metadata.create_all(bind=db.engine)
+    # Load the authorization fields of the current user once per request, via a short-lived cache
+    jwt.user_lookup_loader(load_current_user)
 
     # Register blueprints or routes here
     app.register_blueprint(auth)
     app.register_blueprint(book_bp)
     app.register_blueprint(company_bp)
-    app.register_blueprint(revoked_tokens_bp)  
-    
+    app.register_blueprint(revoked_tokens_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(metrics_bp)
+
     # Serve Swagger UI
     SWAGGER_URL = '/api/doc'  # URL for accessing Swagger UI (usually /api/doc)
     API_URL = '/swagger.json' # URL for accessing Swagger JSON (usually /swagger.json)
 
     swagger_ui_blueprint = get_swaggerui_blueprint(
-        SWAGGER_URL,  
+        SWAGGER_URL,
         API_URL,
-        config={  
+        config={
             'app_name': "Authors API",
             'swagger': "2.0",
         }
     )
 
     app.register_blueprint(swagger_ui_blueprint)  # Register once without URL prefix
-    
+
     @app.route('/')
     def home():
         return "AUTHORS API project set up 1"
 
-    # Route for serving Swagger JSON
+    # Route for serving Swagger JSON, generated from the registered routes and precompressed
     @app.route('/swagger.json')
     def serve_swagger_json():
-        swagger_file_path = os.path.join(app.root_path, 'swagger.json')
-        return send_file(swagger_file_path, mimetype='application/json')
+        return openapi.response()
+
+    openapi.init_app(app)
+
+
+def register_commands(app):
+    # Each command imports what it runs, so loading the CLI doesn't load every command's dependencies
+    @app.cli.command('purge-revoked-tokens')
+    def purge_revoked_tokens():
+        """Delete revoked token rows whose tokens have expired."""
+        from app.blocklist import blocklist
+        print(f'Purged {blocklist.purge_expired()} expired revoked tokens')
+
+    @app.cli.command('purge-tombstones')
+    def purge_tombstones_command():
+        """Delete deletion records older than SYNC_TOMBSTONE_RETENTION_DAYS."""
+        from app.sync import purge_tombstones
+        print(f'Purged {purge_tombstones()} expired tombstones')
+
+    jobs_cli = AppGroup('jobs', help='Run and inspect background jobs.')
+
+    @jobs_cli.command('worker')
+    @click.option('--burst', is_flag=True, help='Exit once no job is due instead of polling.')
+    @click.option('--poll-interval', type=float, default=None, help='Seconds to wait when the queue is empty.')
+    def jobs_worker(burst, poll_interval):
+        """Run queued jobs from the jobs table."""
+        from app.jobs import job_queue
+        from app import deletions  # noqa: F401  Registers the deletion job handlers
+        processed = job_queue.work(burst=burst, poll_interval=poll_interval)
+        print(f'Processed {processed} jobs')
+
+    app.cli.add_command(jobs_cli)
+
+    schema_cli = AppGroup('schema', help='Inspect the database schema.')
+
+    @schema_cli.command('check')
+    def schema_check():
+        """Verify the database matches the migrations head and the models."""
+        from app.schema import check_schema
+        problems = check_schema()
+        for problem in problems:
+            print(problem)
+        if problems:
+            raise SystemExit(1)
+        print('Schema is up to date')
 
-    return app
\ No newline at end of file
+    app.cli.add_command(schema_cli)
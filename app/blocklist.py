@@ -0,0 +1,244 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from app.extensions import db
+from app.models.revoked_tokens import RevokedTokenModel
+from app.replicas import primary_reads
+
+USER_PREFIX = 'user:'
+
+
+class BloomFilter:
+    # Compact probabilistic set: no false negatives, tunable false-positive rate
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class TokenBlocklist:
+    # Answers "is this jti revoked?" mostly from memory.
+    #
+    # Every REVOKED_TOKEN_CACHE_TTL seconds the process adds the jtis revoked since
+    # its last load to a snapshot (a Bloom filter or a plain set). Tokens revoked by
+    # this process are known immediately; revocations made by other workers become
+    # visible on the next refresh. Bloom filter hits are confirmed against the
+    # unique jti index and the answer is kept in a small LRU.
+    #
+    # Deleted users are kept apart, with their deletion time: only tokens issued
+    # before it are revoked, so an account that gets the id later is unaffected.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = {}  # jti -> expiry timestamp, revoked by this process
+        self.users = {}  # user key -> deletion timestamp, from the snapshot
+        self.local_users = {}  # user key -> deletion timestamp, deleted by this process
+        self.snapshot = None
+        self.snapshot_capacity = None  # Bloom filter capacity; None for a plain set
+        self.snapshot_size = 0
+        self.snapshot_loaded_at = 0
+        self.snapshot_built_at = 0
+        self.loaded_until = None  # Start time of the last load
+        self.confirmed = OrderedDict()
+        self.last_purge = time.monotonic()
+
+    def _config(self, key, default):
+        return current_app.config.get(key, default)
+
+    def _load(self, since):
+        # Unexpired revocations, or only those made since the last load
+        stmt = db.select(RevokedTokenModel.jti, RevokedTokenModel.revoked_at).where(
+            db.or_(RevokedTokenModel.expires_at.is_(None), RevokedTokenModel.expires_at > datetime.now()))
+        if since is not None:
+            stmt = stmt.where(RevokedTokenModel.revoked_at >= since)
+        jtis, users = [], {}
+        with primary_reads():
+            for jti, revoked_at in db.session.execute(stmt):
+                if jti.startswith(USER_PREFIX):
+                    users[jti] = revoked_at.timestamp() if revoked_at else time.time()
+                else:
+                    jtis.append(jti)
+        return jtis, users
+
+    def _new_snapshot(self, size):
+        # Room for twice the current rows, so incremental loads can add to it until the next rebuild
+        if self._config('REVOKED_TOKEN_BLOOM_FILTER', True):
+            capacity = max(size * 2, 1024)
+            return BloomFilter(capacity, self._config('REVOKED_TOKEN_BLOOM_ERROR_RATE', 0.01)), capacity
+        return set(), None
+
+    def _refresh(self):
+        # Rows revoked since the previous load are added to the snapshot. The window reaches
+        # REVOKED_TOKEN_RELOAD_OVERLAP seconds back, for revocations committed after they
+        # were stamped. The snapshot is rebuilt every REVOKED_TOKEN_REBUILD_INTERVAL seconds,
+        # or once it is full, which also drops the expired rows.
+        started = datetime.now()
+        rebuild = (self.snapshot is None
+                   or time.monotonic() - self.snapshot_built_at > self._config('REVOKED_TOKEN_REBUILD_INTERVAL', 3600)
+                   or (self.snapshot_capacity is not None and self.snapshot_size > self.snapshot_capacity))
+        since = None
+        if not rebuild:
+            since = self.loaded_until - timedelta(seconds=self._config('REVOKED_TOKEN_RELOAD_OVERLAP', 60))
+        jtis, users = self._load(since)
+
+        if rebuild:
+            snapshot, capacity = self._new_snapshot(len(jtis))
+            size, merged_users = 0, {}
+        else:
+            snapshot, capacity, size, merged_users = self.snapshot, self.snapshot_capacity, self.snapshot_size, dict(self.users)
+        with self.lock:
+            for jti in jtis:
+                # The overlap loads recent rows again; only new ones take up capacity
+                if jti not in snapshot:
+                    snapshot.add(jti)
+                    size += 1
+            for key, revoked_at in users.items():
+                merged_users[key] = max(revoked_at, merged_users.get(key, 0))
+            self.snapshot, self.snapshot_capacity, self.snapshot_size = snapshot, capacity, size
+            self.users = merged_users
+            self.loaded_until = started
+            self.snapshot_loaded_at = time.monotonic()
+            if rebuild:
+                self.snapshot_built_at = self.snapshot_loaded_at
+                self.confirmed.clear()
+            # Revocations made by this process are dropped from local once the snapshot has them
+            for jti in jtis:
+                self.local.pop(jti, None)
+                self.confirmed.pop(jti, None)
+            for key in [key for key, revoked_at in self.local_users.items() if merged_users.get(key, 0) >= revoked_at]:
+                del self.local_users[key]
+            expired = [jti for jti, exp in self.local.items() if exp is not None and exp < time.time()]
+            for jti in expired:
+                del self.local[jti]
+
+    def _confirm(self, jti):
+        with self.lock:
+            if jti in self.confirmed:
+                self.confirmed.move_to_end(jti)
+                return self.confirmed[jti]
+        with primary_reads():
+            revoked = db.session.execute(
+                db.select(RevokedTokenModel.id).where(RevokedTokenModel.jti == jti)).first() is not None
+        with self.lock:
+            self.confirmed[jti] = revoked
+            if len(self.confirmed) > self._config('REVOKED_TOKEN_CACHE_SIZE', 1024):
+                self.confirmed.popitem(last=False)
+        return revoked
+
+    def _maybe_refresh(self):
+        if (self.snapshot is None
+                or time.monotonic() - self.snapshot_loaded_at > self._config('REVOKED_TOKEN_CACHE_TTL', 30)):
+            self._refresh()
+
+    def is_revoked(self, jti):
+        if jti in self.local:
+            return True
+        self._maybe_refresh()
+        if jti not in self.snapshot:
+            return False
+        if isinstance(self.snapshot, BloomFilter):
+            return self._confirm(jti)
+        return True
+
+    def add(self, jti, exp):
+        # Adds the revocation to the caller's transaction; call remember() once it has committed
+        expires_at = datetime.fromtimestamp(exp) if exp else None
+        db.session.add(RevokedTokenModel(jti=jti, expires_at=expires_at))
+
+    def add_user(self, user_id):
+        # Revokes every token issued to the user so far, in the caller's transaction; a row
+        # left by an earlier account with the same id is replaced. Returns the deletion time.
+        key = user_key(user_id)
+        revoked_at = datetime.now()
+        db.session.execute(db.delete(RevokedTokenModel).where(RevokedTokenModel.jti == key)
+                           .execution_options(synchronize_session=False))
+        db.session.add(RevokedTokenModel(jti=key, revoked_at=revoked_at,
+                                         expires_at=datetime.fromtimestamp(session_expiry())))
+        return revoked_at.timestamp()
+
+    def remember_user(self, user_id, revoked_at):
+        with self.lock:
+            self.local_users[user_key(user_id)] = revoked_at
+
+    def is_user_revoked(self, user_id, issued_at):
+        # iat has whole seconds and MySQL DATETIME drops the fraction, so a token issued in
+        # the second of the deletion counts as issued before it
+        self._maybe_refresh()
+        key = user_key(user_id)
+        revoked_at = max(self.users.get(key, 0), self.local_users.get(key, 0))
+        return bool(revoked_at) and issued_at <= int(revoked_at)
+
+    def remember(self, jti, exp):
+        with self.lock:
+            self.local[jti] = exp
+            self.confirmed.pop(jti, None)
+
+    def revoke(self, *revocations):
+        # (jti, exp) pairs, committed together
+        for jti, exp in revocations:
+            self.add(jti, exp)
+        db.session.commit()
+        for jti, exp in revocations:
+            self.remember(jti, exp)
+        self.maybe_purge()
+
+    def purge_expired(self):
+        # Expired tokens are rejected by signature checks anyway, so their rows can go
+        deleted = RevokedTokenModel.query.filter(RevokedTokenModel.expires_at < datetime.now()).delete(
+            synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def maybe_purge(self):
+        interval = self._config('REVOKED_TOKEN_PURGE_INTERVAL', 3600)
+        with self.lock:
+            if time.monotonic() - self.last_purge < interval:
+                return
+            self.last_purge = time.monotonic()
+        self.purge_expired()
+
+
+blocklist = TokenBlocklist()
+
+
+def session_key(session_id):
+    return f'sid:{session_id}'
+
+
+def user_key(user_id):
+    return f'{USER_PREFIX}{user_id}'
+
+
+def session_expiry():
+    # Latest expiry of any token of a session or user issued so far: the refresh token's
+    return time.time() + current_app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds()
+
+
+def check_if_token_revoked(jwt_header, jwt_payload):
+    # A token is revoked on its own, with its login session (logout) or with its user (deletion)
+    keys = [jwt_payload['jti']]
+    if jwt_payload.get('sid'):
+        keys.append(session_key(jwt_payload['sid']))
+    if any(blocklist.is_revoked(key) for key in keys):
+        return True
+    return blocklist.is_user_revoked(jwt_payload['sub'], jwt_payload.get('iat', 0))
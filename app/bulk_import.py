@@ -0,0 +1,145 @@
+import json
+from datetime import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+from app.extensions import db
+from app.models.books import Book
+from app.models.companies import Company
+from app.search import search
+from app.result_cache import result_cache
+
+REQUIRED_FIELDS = ('title', 'description', 'publication_date', 'isbn', 'genre', 'pages', 'company_id')
+STRING_FIELDS = ('title', 'description', 'price_unit', 'isbn', 'genre')
+INTEGER_FIELDS = ('price', 'pages', 'company_id')
+
+
+class BulkImportError(ValueError):
+    pass
+
+
+def parse_rows(request, max_rows):
+    # Accepts a JSON array, or one JSON object per line for application/x-ndjson
+    if request.mimetype == 'application/x-ndjson':
+        rows = []
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)  # Reported as an invalid row
+            if len(rows) > max_rows:
+                break
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            raise BulkImportError('Expected a JSON array of books')
+
+    if not rows:
+        raise BulkImportError('No books to import')
+    if len(rows) > max_rows:
+        raise BulkImportError(f'At most {max_rows} books can be imported at once')
+    return rows
+
+
+def validate_row(data, user_id):
+    if not isinstance(data, dict):
+        return None, 'Row is not a JSON object'
+
+    missing = [field for field in REQUIRED_FIELDS if data.get(field) in (None, '')]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+
+    for field in STRING_FIELDS:
+        value = data.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            return None, f'{field} must be a string'
+        length = Book.__table__.c[field].type.length
+        if len(value) > length:
+            return None, f'{field} must be at most {length} characters'
+
+    for field in INTEGER_FIELDS:
+        value = data.get(field)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            return None, f'{field} must be an integer'
+
+    try:
+        publication_date = datetime.strptime(data['publication_date'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None, 'publication_date must be in YYYY-MM-DD format'
+
+    return {
+        'title': data['title'],
+        'description': data['description'],
+        'price': data.get('price'),
+        'price_unit': data.get('price_unit') or 'UGX',
+        'pages': data['pages'],
+        'publication_date': publication_date,
+        'isbn': data['isbn'],
+        'genre': data['genre'],
+        'user_id': user_id,
+        'company_id': data['company_id'],
+    }, None
+
+
+def import_books(rows, user_id, chunk_size):
+    results = [None] * len(rows)
+    valid = []  # (row index, values)
+
+    # One validation pass over every row
+    for index, data in enumerate(rows):
+        values, error = validate_row(data, user_id)
+        if error:
+            results[index] = {'row': index, 'status': 'error', 'error': error}
+        else:
+            valid.append((index, values))
+
+    # Duplicates within the payload: the first occurrence wins
+    seen = set()
+    unique = []
+    for index, values in valid:
+        if values['isbn'] in seen:
+            results[index] = {'row': index, 'status': 'error', 'error': 'Duplicate isbn in request'}
+        else:
+            seen.add(values['isbn'])
+            unique.append((index, values))
+    valid = unique
+
+    # Existing isbns and known companies, each in a single IN query
+    if valid:
+        existing = set(db.session.execute(
+            db.select(Book.isbn).where(Book.isbn.in_([values['isbn'] for _, values in valid]))).scalars())
+        companies = set(db.session.execute(
+            db.select(Company.id).where(Company.id.in_({values['company_id'] for _, values in valid}))).scalars())
+        checked = []
+        for index, values in valid:
+            if values['isbn'] in existing:
+                results[index] = {'row': index, 'status': 'error', 'error': 'isbn already exists'}
+            elif values['company_id'] not in companies:
+                results[index] = {'row': index, 'status': 'error', 'error': 'Company not found'}
+            else:
+                checked.append((index, values))
+        valid = checked
+
+    # Insert in chunks; each chunk is one executemany inside its own transaction
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            db.session.execute(db.insert(Book), [values for _, values in chunk])
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            error = str(getattr(e, 'orig', e))
+            for index, values in chunk:
+                results[index] = {'row': index, 'status': 'error', 'isbn': values['isbn'], 'error': error}
+            continue
+        for index, values in chunk:
+            results[index] = {'row': index, 'status': 'created', 'isbn': values['isbn']}
+        search.index_isbns([values['isbn'] for _, values in chunk])
+        # Core inserts bypass the ORM events that normally invalidate cached reads
+        result_cache.invalidate('books')
+
+    return results
@@ -0,0 +1,66 @@
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # Optional dependency; responses are only gzipped without it
+    brotli = None
+
+
+def accepted_encoding():
+    # Best encoding the client accepts, honouring q-values; 'identity' when none match
+    offers = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offers, default='identity')
+
+
+def encode(data, encoding, level=6, brotli_quality=4):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level)
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return data
+
+
+class Compressor:
+    # Compresses buffered responses of text types above COMPRESS_MIN_SIZE. Streamed
+    # responses (NDJSON exports) and ones that already carry an encoding are left alone.
+
+    def __init__(self):
+        self.mimetypes = frozenset()
+        self.min_size = 1024
+
+    def init_app(self, app):
+        if not app.config.get('COMPRESS_ENABLED', True):
+            return
+        self.mimetypes = frozenset(app.config.get('COMPRESS_MIMETYPES', ('application/json',)))
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        app.after_request(self.compress)
+        app.extensions['compressor'] = self
+
+    def compress(self, response):
+        if (response.mimetype not in self.mimetypes or response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        # The body depends on Accept-Encoding even when this one goes out uncompressed
+        response.vary.add('Accept-Encoding')
+        encoding = accepted_encoding()
+        if encoding == 'identity':
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        response.set_data(encode(data, encoding, current_app.config.get('COMPRESS_LEVEL', 6),
+                                 current_app.config.get('COMPRESS_BROTLI_QUALITY', 4)))
+        response.headers['Content-Encoding'] = encoding
+        # The compressed bytes are another representation, so a strong validator becomes weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compressor = Compressor()
@@ -1,14 +1,22 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, abort, jsonify, request, url_for
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt, get_current_user
 from app.models.users import User, db
-from app.models.books import Book
-from email_validator import validate_email, EmailNotValidError
-from flask_bcrypt import Bcrypt
-from app.models.revoked_tokens import RevokedTokenModel
+from email_validator import EmailNotValidError
+from uuid import uuid4
+from app.blocklist import blocklist, session_key, session_expiry
+from app.pagination import paginate, PaginationError
+from app.serializers import job_schema, user_schema
+from app.streaming import stream_ndjson, wants_ndjson
+from app.deletions import delete_user as delete_user_rows, enqueue_delete, should_defer, user_book_criteria
+from app.user_cache import user_cache, role_claims
+from app.decorators import require_role
+from app.passwords import password_hasher, PasswordHasherBusy
+from app.email_checks import email_checker
+from app.integrity import integrity_error_response
+from sqlalchemy.exc import IntegrityError
 
 
 auth = Blueprint('auth', __name__, url_prefix='/api/v1/auth')
-bcrypt = Bcrypt()
 
 @auth.route('/register', methods=['POST'])
 def register():
@@ -32,25 +40,19 @@ def register():
         if len(password) < 6:
             return jsonify({'error': 'Password is too short'}), 400
 
-        # Email validation 
-        validate_email(email)
+        # Email validation: syntax only, plus cached background deliverability checks when enabled
+        email_checker.validate(email)
 
-        # Check for uniqueness of email and contact separately
-        if User.query.filter_by(email=email).first() is not None:
-            return jsonify({'error': 'Email already exists'}), 409
-
-        if User.query.filter_by(contact=contact).first() is not None:
-            return jsonify({'error': 'Contact already exists'}), 409
-
-        # Hash the password
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        # Hash the password in the hashing pool
+        hashed_password = password_hasher.hash(password)
 
         # Creating a new user
         new_user = User(first_name=first_name, last_name=last_name, email=email,
                         contact=contact, password=hashed_password, user_type=user_type,
                         biography=biography)
 
-        # Adding and committing to the database
+        # Adding and committing to the database; the unique constraints on email and
+        # contact reject duplicates, so no lookup is needed beforehand
         db.session.add(new_user)
         db.session.commit()
 
@@ -72,58 +74,50 @@ def register():
 
     except EmailNotValidError:
         return jsonify({'error': 'Email is not valid'}), 400
+    except PasswordHasherBusy as e:
+        return jsonify({'error': str(e)}), 503
+    except IntegrityError as e:
+        db.session.rollback()
+        return integrity_error_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth.route('/users/', methods=['GET'])
-@jwt_required()  # Only authenticated users can access this route
+@require_role('admin')  # Only admins can access this route
 def get_all_users():
-    current_user = get_jwt_identity()
-    user = User.query.filter_by(id=current_user).first()
-    if user.user_type != 'admin':
-        return jsonify({'error': 'You are not authorized to access this route'}), 403
-
-    users = User.query.all()
-    output = []
-    for user in users:
-        user_data = {
-            'id': user.id,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'contact': user.contact,
-            'user_type': user.user_type,
-            'biography': user.biography
-        }
-        output.append(user_data)
-    return jsonify({'users': output})
+    try:
+        if wants_ndjson(request):
+            return stream_ndjson(user_schema)
+        output, next_cursor = paginate(user_schema)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'users': output, 'next': next_cursor})
+
+@auth.route('/users/export', methods=['GET'])
+@require_role('admin')  # Only admins can access this route
+def export_users():
+    try:
+        return stream_ndjson(user_schema)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
 
 @auth.route('/user/<int:id>', methods=['GET'])
 @jwt_required()  # Only authenticated users can access this route
 def get_user(id):
-    current_user = get_jwt_identity()
-    user = User.query.filter_by(id=current_user).first()
+    user = get_current_user()
     if user.user_type != 'admin' and user.id != id:
         return jsonify({'error': 'You are not authorized to access this user data'}), 403
 
-    user = User.query.get_or_404(id)
-    user_data = {
-        'id': user.id,
-        'email': user.email,
-        'first_name': user.first_name,
-        'last_name': user.last_name,
-        'contact': user.contact,
-        'user_type': user.user_type,
-        'biography': user.biography
-    }
-    return jsonify(user_data)
+    row = db.session.execute(user_schema.select().where(User.id == id)).first()
+    if row is None:
+        abort(404)
+    return jsonify(user_schema.dump_row(row))
 
 @auth.route('/user/<int:id>', methods=['PUT'])
 @jwt_required()  # Only authenticated users can access this route
 def update_user(id):
-    current_user = get_jwt_identity()
-    user = User.query.filter_by(id=current_user).first()
+    user = get_current_user()
     if user.user_type != 'admin' and user.id != id:
         return jsonify({'error': 'You are not authorized to update this user'}), 403
 
@@ -137,11 +131,18 @@ def update_user(id):
         user.user_type = data.get('user_type', user.user_type)
         password = data.get('password')
         if password:
-            user.password = bcrypt.generate_password_hash(password).decode('utf-8')
+            user.password_hash = password_hasher.hash(password)
         user.biography = data.get('biography', user.biography)
         db.session.commit()
+        user_cache.invalidate(id)
         return jsonify({'message': 'User updated successfully'})
 
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503
+    except IntegrityError as e:
+        db.session.rollback()
+        return integrity_error_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -149,22 +150,23 @@ def update_user(id):
 @auth.route('/user/<int:id>', methods=['DELETE'])
 @jwt_required()  # Only authenticated users can access this route
 def delete_user(id):
-    current_user = get_jwt_identity()
-    user = User.query.filter_by(id=current_user).first()
+    user = get_current_user()
     if user.user_type != 'admin' and user.id != id:
         return jsonify({'error': 'You are not authorized to delete this user'}), 403
 
     try:
-        # Check if there are related records in the books table
-        related_books = Book.query.filter_by(user_id=id).all()
-        for book in related_books:
-            db.session.delete(book)
-        
-        # Delete the user
-        user = User.query.get_or_404(id)
-        db.session.delete(user)
-        db.session.commit()
-        
+        if db.session.scalar(db.select(User.id).where(User.id == id)) is None:
+            return jsonify({'error': 'User not found'}), 404
+
+        # Accounts with many books are deleted in the background; ?async=true asks for it explicitly
+        criteria = user_book_criteria(id)
+        if request.args.get('async') == 'true' or should_defer(criteria):
+            job = enqueue_delete('user', id, user.id, criteria)
+            location = url_for('jobs.get_job', job_id=job.id)
+            return jsonify({'message': 'User deletion started', 'job': job_schema.dump(job)}), 202, {'Location': location}
+
+        # The user, their books and their companies go in one transaction, one statement per table
+        delete_user_rows(id)
         return jsonify({'message': 'User and associated books deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -183,12 +185,41 @@ def login():
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        if not bcrypt.check_password_hash(user.password_hash, password):
+        if not password_hasher.verify(user.password_hash, password):
             return jsonify({'error': 'Invalid password'}), 401
 
-        # Password is correct, generate access token
-        access_token = create_access_token(identity=user.id)
-        return jsonify({'message': f'Login successful. You have logged in as {user.user_type}', 'access_token': access_token}), 200
+        # Upgrade hashes made with a different work factor while the plain password is at hand
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
+
+        # Password is correct, generate tokens; the access token carries the role claims and
+        # both share a session id, so logging out revokes the refresh token as well
+        session_id = uuid4().hex
+        access_token = create_access_token(identity=user.id, additional_claims=dict(role_claims(user), sid=session_id))
+        refresh_token = create_refresh_token(identity=user.id, additional_claims={'sid': session_id})
+        return jsonify({'message': f'Login successful. You have logged in as {user.user_type}',
+                        'access_token': access_token, 'refresh_token': refresh_token}), 200
+
+    except PasswordHasherBusy as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@auth.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)  # Requires a refresh token
+def refresh():
+    try:
+        # Read the role from the database so changes made through update_user are picked up
+        user = User.query.get(get_jwt_identity())
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        claims = role_claims(user)
+        if get_jwt().get('sid'):
+            claims['sid'] = get_jwt()['sid']
+        access_token = create_access_token(identity=user.id, additional_claims=claims)
+        return jsonify({'access_token': access_token}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -197,11 +228,12 @@ def login():
 @jwt_required()  # Only authenticated users can access this route
 def logout():
     try:
-        # Logout the user by invalidating the JWT token
-        jti = get_jwt()['jti']
-        revoked_token = RevokedTokenModel(jti=jti)
-        db.session.add(revoked_token)
-        db.session.commit()
+        # Logout the user by invalidating the JWT token and every other token of its session
+        token = get_jwt()
+        revocations = [(token['jti'], token.get('exp'))]
+        if token.get('sid'):
+            revocations.append((session_key(token['sid']), session_expiry()))
+        blocklist.revoke(*revocations)
         return jsonify({'message': 'Logout successful'}), 200
     except Exception as e:
         return jsonify({'error':str(e)}),500
\ No newline at end of file
@@ -1,14 +1,57 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from datetime import datetime
 from app.models.books import Book
-from app.models.users import User
 from app.extensions import db
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.pagination import paginate, get_page_size, get_projection, PaginationError
+from app.serializers import book_schema
+from app.search import search
+from app.decorators import require_role
+from app.bulk_import import parse_rows, import_books, BulkImportError
+from app.http_cache import conditional_response, collection_last_modified, serialize, json_response
+from app.result_cache import result_cache
+from app.integrity import integrity_error_response
+from sqlalchemy.exc import IntegrityError
+from app.expand import get_expansions, expansion_keys, expansion_models, expand_books
+from app.streaming import stream_ndjson, wants_ndjson
+from app.sync import changes, record_deletions, WatermarkExpired
+from flask_jwt_extended import get_jwt_identity
 
 book_bp = Blueprint('book', __name__, url_prefix='/api/v1/book')
 
+# Columns the list endpoint can be sorted by; each one is backed by an index on books
+BOOK_SORTABLE = ('id', 'title', 'publication_date')
+
+
+def get_book_filters():
+    # Translate query parameters into indexed SQL criteria
+    args = request.args
+    criteria = []
+    try:
+        if args.get('genre'):
+            criteria.append(Book.genre == args['genre'])
+        if args.get('company_id'):
+            criteria.append(Book.company_id == int(args['company_id']))
+        if args.get('user_id'):
+            criteria.append(Book.user_id == int(args['user_id']))
+        if args.get('min_price'):
+            criteria.append(Book.price >= int(args['min_price']))
+        if args.get('max_price'):
+            criteria.append(Book.price <= int(args['max_price']))
+        if args.get('published_after'):
+            criteria.append(Book.publication_date >= datetime.strptime(args['published_after'], '%Y-%m-%d').date())
+        if args.get('published_before'):
+            criteria.append(Book.publication_date <= datetime.strptime(args['published_before'], '%Y-%m-%d').date())
+    except ValueError:
+        raise PaginationError('Invalid filter value')
+    return criteria
+
+def books_last_modified(expansions):
+    # Expanded responses also change when the embedded authors or companies do
+    modified = [collection_last_modified(model) for model in [Book] + expansion_models(expansions)]
+    return max((value for value in modified if value), default=None)
+
 @book_bp.route('/register', methods=['POST'])
-@jwt_required()  # Only authenticated users can access this route
+@require_role('author', message="Only authors can register books")
 def register_book():
     try:
         data = request.get_json()
@@ -26,11 +69,6 @@ def register_book():
         
         # Get current user ID from JWT token
         current_user_id = get_jwt_identity()
-        
-        # Check if the user is an author (user)
-        current_user = User.query.get(current_user_id)
-        if current_user.user_type != 'author':
-            return jsonify({"error": "Only authors can register books"}), 403
 
         # Check if publication_date is provided
         if publication_date is None:
@@ -49,41 +87,53 @@ def register_book():
         # Add the book to the database session and commit changes
         db.session.add(new_book)
         db.session.commit()
+        search.index_book(new_book)
         
         # Construct response message with all book details
         message = f"Book '{new_book.title}' with ID '{new_book.id}' has been registered"
-        book_details = {
-            'id': new_book.id,
-            'title': new_book.title,
-            'description': new_book.description,
-            'price': new_book.price,
-            'price_unit': new_book.price_unit,
-            'pages': new_book.pages,
-            'publication_date': new_book.publication_date.isoformat(),
-            'isbn': new_book.isbn,
-            'genre': new_book.genre,
-            'user_id': new_book.user_id,
-            'company_id': new_book.company_id
-        }
+        book_details = book_schema.dump(new_book)
 
         return jsonify({"message": message, "book": book_details}), 201
 
+    except IntegrityError as e:
+        db.session.rollback()
+        return integrity_error_response(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@book_bp.route('/bulk', methods=['POST'])
+@require_role('author', message="Only authors can register books")
+def bulk_register_books():
+    try:
+        rows = parse_rows(request, current_app.config.get('BULK_IMPORT_MAX_ROWS', 10000))
+
+        # Validate every row, then insert the valid ones in chunked transactions
+        results = import_books(rows, get_jwt_identity(), current_app.config.get('BULK_IMPORT_CHUNK_SIZE', 500))
+        created = sum(1 for result in results if result['status'] == 'created')
+
+        return jsonify({
+            "message": f"{created} of {len(results)} books have been registered",
+            "created": created,
+            "failed": len(results) - created,
+            "results": results
+        }), 201 if created else 400
+
+    except BulkImportError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
 @book_bp.route('/book/<int:book_id>', methods=['DELETE'])
-@jwt_required()  # Only authenticated users can access this route
+@require_role('author', message="Only authors can delete books")
 def delete_book(book_id):
     try:
         # Get current user ID from JWT token
         current_user_id = get_jwt_identity()
         
-        # Check if the user is an author (user)
-        current_user = User.query.get(current_user_id)
-        if current_user.user_type != 'author':
-            return jsonify({"error": "Only authors can delete books"}), 403
         
         # Find the book to delete
         book_to_delete = Book.query.filter_by(id=book_id, user_id=current_user_id).first()
@@ -91,7 +141,9 @@ def delete_book(book_id):
             return jsonify({"error": "Book not found or you don't have permission to delete it"}), 404
 
         db.session.delete(book_to_delete)
+        record_deletions('books', [book_id])
         db.session.commit()
+        search.remove_book(book_id)
 
         return jsonify({"message": f"Book with ID {book_id} has been deleted"}), 200
 
@@ -101,7 +153,7 @@ def delete_book(book_id):
 
 #update
 @book_bp.route('/book/<int:book_id>', methods=['PUT'])
-@jwt_required()  # Only authenticated users can access this route
+@require_role('author', message="Only authors can update books")
 def update_book(book_id):
     try:
         data = request.get_json()
@@ -109,10 +161,6 @@ def update_book(book_id):
         # Get current user ID from JWT token
         current_user_id = get_jwt_identity()
         
-        # Check if the user is an author (user)
-        current_user = User.query.get(current_user_id)
-        if current_user.user_type != 'author':
-            return jsonify({"error": "Only authors can update books"}), 403
 
         # Find the book to update
         book_to_update = Book.query.filter_by(id=book_id, user_id=current_user_id).first()
@@ -130,9 +178,13 @@ def update_book(book_id):
         book_to_update.genre = data.get('genre', book_to_update.genre)
 
         db.session.commit()
+        search.index_book(book_to_update)
 
         return jsonify({"message": f"Book with ID {book_id} has been updated"}), 200
 
+    except IntegrityError as e:
+        db.session.rollback()
+        return integrity_error_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -141,51 +193,103 @@ def update_book(book_id):
 @book_bp.route('/', methods=['GET'])
 def get_all_books():
     try:
-        books = Book.query.all()
+        # Clients asking for NDJSON get the full streamed export instead of a page
+        if wants_ndjson(request):
+            return stream_ndjson(book_schema, *get_book_filters())
+
+        criteria = get_book_filters()
+        expansions = get_expansions()
+
+        def load():
+            # Keyset pagination, optionally filtered, sorted and projected to ?fields=
+            book_list, next_cursor = paginate(book_schema, *criteria, sortable=BOOK_SORTABLE,
+                                              include=expansion_keys(expansions))
+            return serialize({"books": expand_books(book_list, expansions), "next": next_cursor})
+
+        # Serialized and hashed once per cache miss; hits and 304s reuse the body and ETag
+        body, etag = result_cache.get_or_set('books', result_cache.request_key(), load)
+        return conditional_response(etag, books_last_modified(expansions), lambda: (json_response(body), 200))
+
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@book_bp.route('/changes', methods=['GET'])
+def get_book_changes():
+    try:
+        # Books changed and deleted since the client's last sync; pass ?cursor=next until has_more is false
+        return jsonify(changes(book_schema, 'books')), 200
+
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except WatermarkExpired as e:
+        return jsonify({"error": str(e)}), 410
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@book_bp.route('/export', methods=['GET'])
+def export_books():
+    try:
+        # Stream every book as one JSON document per line
+        return stream_ndjson(book_schema, *get_book_filters())
+
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@book_bp.route('/search', methods=['GET'])
+def search_books():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Search query is required"}), 400
+
+        # Rank ids through the search index, then load only those rows
+        expansions = get_expansions()
+        ranked = search.search(query, get_page_size())
+        if not ranked:
+            return jsonify({"books": []}), 200
+
+        scores = dict(ranked)
+        columns = get_projection(book_schema, extra=expansion_keys(expansions))
+        stmt = db.select(*columns).where(Book.id.in_(scores))
+        books = {row.id: book_schema.dump_row(row) for row in db.session.execute(stmt)}
         book_list = []
-        for book in books:
-            book_details = {
-                'id': book.id,
-                'title': book.title,
-                'description': book.description,
-                'price': book.price,
-                'price_unit': book.price_unit,
-                'pages': book.pages,
-                'publication_date': book.publication_date.isoformat(),
-                'isbn': book.isbn,
-                'genre': book.genre,
-                'user_id': book.user_id,
-                'company_id': book.company_id
-            }
-            book_list.append(book_details)
-        
+        for book_id, score in ranked:
+            if book_id in books:
+                book_list.append(dict(books[book_id], score=round(score, 4)))
+        expand_books(book_list, expansions)
+
         return jsonify({"books": book_list}), 200
-    
+
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @book_bp.route('/book/<int:book_id>', methods=['GET'])
 def get_book(book_id):
     try:
-        book = Book.query.get(book_id)
-        if not book:
+        expansions = get_expansions()
+
+        def load():
+            row = db.session.execute(
+                book_schema.select(Book.created_at, Book.updated_at).where(Book.id == book_id)).first()
+            if row is None:
+                return None
+            book_details = expand_books([book_schema.dump_row(row)], expansions)[0]
+            return serialize({"book": book_details}) + (row.updated_at or row.created_at,)
+
+        cached = result_cache.get_or_set('books', f'book:{book_id}:{expansions}', load)
+        if cached is None:
             return jsonify({"error": "Book not found"}), 404
-        
-        book_details = {
-            'id': book.id,
-            'title': book.title,
-            'description': book.description,
-            'price': book.price,
-            'price_unit': book.price_unit,
-            'pages': book.pages,
-            'publication_date': book.publication_date.isoformat(),
-            'isbn': book.isbn,
-            'genre': book.genre,
-            'user_id': book.user_id,
-            'company_id': book.company_id
-        }
-        
-        return jsonify({"book": book_details}), 200
-    
+
+        body, etag, last_modified = cached
+        return conditional_response(etag, last_modified, lambda: (json_response(body), 200))
+
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error":str(e)}),500
\ No newline at end of file
@@ -1,7 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, url_for
 from app.models.companies import Company, db
-from app.models.users import User
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.pagination import paginate, PaginationError
+from app.serializers import company_schema, job_schema
+from app.decorators import require_role
+from app.http_cache import conditional_response, serialize, json_response
+from app.result_cache import result_cache
+from app.sync import changes, WatermarkExpired
+from app.integrity import integrity_error_response
+from sqlalchemy.exc import IntegrityError
+from app.deletions import delete_company as delete_company_rows, enqueue_delete, should_defer, company_book_criteria
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
 
 company_bp = Blueprint('company', __name__, url_prefix='/api/v1/company')
 
@@ -26,9 +34,6 @@ def register_company():
         if not description:
             return jsonify({"error": 'Company description is required'}), 400
         
-        if Company.query.filter_by(name=name).first():
-            return jsonify({"error": 'Company name already exists'})
-
         # Get user ID from JWT token
         user_id = get_jwt_identity()
 
@@ -40,51 +45,49 @@ def register_company():
             user_id=user_id
         )
 
-        # Add company to the database
+        # Add company to the database; the unique index on name rejects duplicates
         db.session.add(new_company)
         db.session.commit()
 
         # Response message
         message = f"Company '{new_company.name}' with ID '{new_company.id}' has been registered"
         return jsonify({"message": message,
-                        "company": {
-                            'id': new_company.id,
-                            'name': new_company.name,
-                            'origin': new_company.origin,
-                            'description': new_company.description,
-                            'user_id': new_company.user_id
-                        }}), 201
+                        "company": company_schema.dump(new_company)}), 201
+    except IntegrityError as e:
+        db.session.rollback()
+        return integrity_error_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 # Get all companies
 @company_bp.route('/', methods=['GET'])
-@jwt_required()  # Only authenticated users can access this route
+@require_role('admin')  # Only admins can access this route
 def get_all_companies():
     try:
-        # Get user ID from JWT token
-        user_id = get_jwt_identity()
-
-        # Get user details
-        user = User.query.get(user_id)
+        # Retrieve one page of companies
+        def load():
+            company_data, next_cursor = paginate(company_schema)
+            return {"companies": company_data, "next": next_cursor}
 
-        # Check if user is admin
-        if user.user_type != 'admin':
-            return jsonify({"error": "You are not authorized to access this route"}), 403
+        return jsonify(result_cache.get_or_set('companies', result_cache.request_key(), load)), 200
 
-        # Retrieve all companies
-        companies = Company.query.all()
-        company_data = [{
-            "id": company.id,
-            "name": company.name,
-            "origin": company.origin,
-            "description": company.description,
-            "user_id": company.user_id
-        } for company in companies]
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        return jsonify({"companies": company_data}), 200
+# Companies changed and deleted since the client's last sync
+@company_bp.route('/changes', methods=['GET'])
+@require_role('admin')  # Only admins can access this route
+def get_company_changes():
+    try:
+        return jsonify(changes(company_schema, 'companies')), 200
 
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except WatermarkExpired as e:
+        return jsonify({"error": str(e)}), 410
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -96,26 +99,30 @@ def get_company(id):
         # Get user ID from JWT token
         user_id = get_jwt_identity()
 
-        # Get user details
-        user = User.query.get(user_id)
+        # Get the current user's authorization details
+        user = get_current_user()
 
         # Retrieve company by ID
-        company = Company.query.get(id)
+        def load():
+            row = db.session.execute(
+                company_schema.select(Company.created_at, Company.updated_at).where(Company.id == id)).first()
+            if row is None:
+                return None
+            return (row.user_id,) + serialize(company_schema.dump_row(row)) + (row.updated_at or row.created_at,)
+
+        cached = result_cache.get_or_set('companies', f'company:{id}', load)
+
+        # Check if the company exists
+        if cached is None:
+            return jsonify({"error": "Company not found"}), 404
+        owner_id, body, etag, last_modified = cached
 
         # Check if user is admin or owner of the company
-        if user.user_type != 'admin' and company.user_id != user_id:
+        if user.user_type != 'admin' and owner_id != user_id:
             return jsonify({"error": "You are not authorized to access this company"}), 403
 
-        # Return company details
-        company_data = {
-            "id": company.id,
-            "name": company.name,
-            "origin": company.origin,
-            "description": company.description,
-            "user_id": company.user_id
-        }
-
-        return jsonify(company_data), 200
+        # Company data is per user, so shared caches must not store it
+        return conditional_response(etag, last_modified, lambda: (json_response(body), 200), private=True)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -148,6 +155,9 @@ def update_company(id):
 
         return jsonify({"message": "Company updated successfully"}), 200
 
+    except IntegrityError as e:
+        db.session.rollback()
+        return integrity_error_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -162,20 +172,26 @@ def delete_company(id):
         # Get user ID from JWT token
         user_id = get_jwt_identity()
 
-        # Retrieve company by ID
-        company = Company.query.get(id)
+        # Retrieve the company owner by ID
+        owner_id = db.session.scalar(db.select(Company.user_id).where(Company.id == id))
 
         # Check if the company exists
-        if not company:
+        if owner_id is None:
             return jsonify({"error": "Company not found"}), 404
 
         # Check if user is admin or owner of the company
-        if user_id != company.user_id:
+        if user_id != owner_id:
             return jsonify({"error": "You are not authorized to delete this company"}), 403
 
-        # Delete company
-        db.session.delete(company)
-        db.session.commit()
+        # Companies with many books are deleted in the background; ?async=true asks for it explicitly
+        criteria = company_book_criteria(id)
+        if request.args.get('async') == 'true' or should_defer(criteria):
+            job = enqueue_delete('company', id, user_id, criteria)
+            location = url_for('jobs.get_job', job_id=job.id)
+            return jsonify({"message": "Company deletion started", "job": job_schema.dump(job)}), 202, {"Location": location}
+
+        # Delete the company and its books, and detach its members, in one transaction
+        delete_company_rows(id)
 
         return jsonify({"message": "Company deleted successfully"}), 200
 
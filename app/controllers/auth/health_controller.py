@@ -0,0 +1,29 @@
+import time
+
+from flask import Blueprint, jsonify
+from sqlalchemy.exc import SQLAlchemyError
+from app.extensions import db
+from app.db_pool import pool_status
+from app.replicas import use_primary
+from app.result_cache import result_cache
+
+health_bp = Blueprint('health', __name__, url_prefix='/health')
+
+@health_bp.route('/db', methods=['GET'])
+@use_primary
+def db_health():
+    # Round trip to the database plus the state of this worker's connection pool
+    started = time.perf_counter()
+    try:
+        db.session.execute(db.text('SELECT 1'))
+        latency = round((time.perf_counter() - started) * 1000, 3)
+        return jsonify({"status": "ok", "latency_ms": latency, "pool": pool_status(db.engine)}), 200
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"status": "unavailable", "error": str(e), "pool": pool_status(db.engine)}), 503
+
+
+@health_bp.route('/cache', methods=['GET'])
+def cache_health():
+    # Hit, miss and eviction counters of this worker's result cache
+    return jsonify(result_cache.stats()), 200
@@ -0,0 +1,38 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_current_user
+from app.extensions import db
+from app.models.jobs import Job
+from app.pagination import paginate, PaginationError
+from app.serializers import job_schema
+from app.decorators import require_role
+from app.replicas import use_primary
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/v1/jobs')
+
+@jobs_bp.route('/', methods=['GET'])
+@require_role('admin')  # Only admins can access this route
+@use_primary
+def get_all_jobs():
+    try:
+        # Optionally narrowed to one status, e.g. ?status=failed
+        criteria = [Job.status == request.args['status']] if request.args.get('status') else []
+        job_list, next_cursor = paginate(job_schema, *criteria)
+        return jsonify({"jobs": job_list, "next": next_cursor}), 200
+
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@jwt_required()  # Only authenticated users can access this route
+@use_primary
+def get_job(job_id):
+    user = get_current_user()
+    job = db.session.get(Job, job_id)
+
+    # Only the user who started the job and admins can follow it
+    if job is None or (user.user_type != 'admin' and job.requested_by != user.id):
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify({"job": job_schema.dump(job)}), 200
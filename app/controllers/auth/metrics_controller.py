@@ -0,0 +1,20 @@
+from flask import Blueprint, Response
+from app.extensions import db
+from app.db_pool import pool_status
+from app.metrics import metrics
+from app.result_cache import result_cache
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Request and SQL metrics of this worker, plus its pool and result cache state
+    lines = [metrics.render()]
+    pool = pool_status(db.engine)
+    for name in ('size', 'checked_in', 'checked_out', 'overflow'):
+        if name in pool:
+            lines.append(f'# TYPE db_pool_{name} gauge\ndb_pool_{name} {pool[name]}\n')
+    cache = result_cache.stats()
+    for name in ('hits', 'misses', 'evictions', 'invalidations'):
+        lines.append(f'# TYPE result_cache_{name}_total counter\nresult_cache_{name}_total {cache[name]}\n')
+    return Response(''.join(lines), mimetype='text/plain; version=0.0.4')
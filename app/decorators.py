@@ -0,0 +1,18 @@
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_current_user
+
+
+def require_role(*roles, message='You are not authorized to access this route'):
+    # Checks the user_type claim of the access token, so no database read is needed.
+    # Replaces @jwt_required() on the route.
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            if get_current_user().user_type not in roles:
+                return jsonify({'error': message}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,128 @@
+from flask import current_app
+from app.blocklist import blocklist
+from app.extensions import db
+from app.jobs import job_queue
+from app.models.books import Book
+from app.models.companies import Company
+from app.models.users import User
+from app.search import search
+from app.sync import record_deletions
+from app.user_cache import user_cache
+
+# Nothing touched here is loaded in the session, so the ORM doesn't need to sync it
+BULK = {'synchronize_session': False}
+
+
+def user_book_criteria(user_id):
+    # Books written by the user and books published by companies the user owns
+    owned_companies = db.select(Company.id).where(Company.user_id == user_id)
+    return db.or_(Book.user_id == user_id, Book.company_id.in_(owned_companies))
+
+
+def company_book_criteria(company_id):
+    return Book.company_id == company_id
+
+
+def count_books(criteria):
+    return db.session.scalar(db.select(db.func.count()).select_from(Book).where(criteria))
+
+
+def delete_books(criteria):
+    # Ids are read first so the search index can drop the same rows
+    book_ids = db.session.scalars(db.select(Book.id).where(criteria)).all()
+    if book_ids:
+        db.session.execute(db.delete(Book).where(criteria).execution_options(**BULK))
+        record_deletions('books', book_ids)
+    return book_ids
+
+
+def detach_members(companies):
+    # Users who belong to a deleted company stay, without a company
+    member_ids = db.session.scalars(db.select(User.id).where(User.company_id.in_(companies))).all()
+    if member_ids:
+        db.session.execute(
+            db.update(User).where(User.id.in_(member_ids)).values(company_id=None).execution_options(**BULK))
+    return member_ids
+
+
+def delete_user_rows(user_id):
+    # One statement per table instead of one per row; the caller owns the transaction
+    book_ids = delete_books(user_book_criteria(user_id))
+    company_ids = db.session.scalars(db.select(Company.id).where(Company.user_id == user_id)).all()
+    member_ids = detach_members(company_ids)
+    db.session.execute(db.delete(Company).where(Company.user_id == user_id).execution_options(**BULK))
+    record_deletions('companies', company_ids)
+    deleted = db.session.execute(db.delete(User).where(User.id == user_id).execution_options(**BULK)).rowcount
+    return deleted, book_ids, member_ids
+
+
+def delete_company_rows(company_id):
+    book_ids = delete_books(company_book_criteria(company_id))
+    member_ids = detach_members([company_id])
+    deleted = db.session.execute(
+        db.delete(Company).where(Company.id == company_id).execution_options(**BULK)).rowcount
+    if deleted:
+        record_deletions('companies', [company_id])
+    return deleted, book_ids, member_ids
+
+
+def after_delete(user_ids, book_ids):
+    # Process-local state only changes once the transaction has committed
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    search.remove_books(book_ids)
+
+
+def delete_user(user_id):
+    deleted, book_ids, member_ids = delete_user_rows(user_id)
+    # Access tokens carry the role claims, so tokens issued before the deletion must stop working
+    revoked_at = blocklist.add_user(user_id) if deleted else None
+    db.session.commit()
+    if revoked_at is not None:
+        blocklist.remember_user(user_id, revoked_at)
+    after_delete([user_id] + member_ids, book_ids)
+    return deleted
+
+
+def delete_company(company_id):
+    deleted, book_ids, member_ids = delete_company_rows(company_id)
+    db.session.commit()
+    after_delete(member_ids, book_ids)
+    return deleted
+
+
+def should_defer(criteria):
+    return count_books(criteria) > current_app.config.get('DELETE_ASYNC_THRESHOLD', 10000)
+
+
+def delete_in_batches(job, criteria):
+    # Books go DELETE_BATCH_SIZE at a time, each batch in its own short transaction
+    # together with the progress update; a retried job carries on where it stopped
+    batch_size = current_app.config.get('DELETE_BATCH_SIZE', 1000)
+    while True:
+        book_ids = db.session.scalars(db.select(Book.id).where(criteria).order_by(Book.id).limit(batch_size)).all()
+        if not book_ids:
+            return
+        db.session.execute(db.delete(Book).where(Book.id.in_(book_ids)).execution_options(**BULK))
+        record_deletions('books', book_ids)
+        job_queue.report(job, deleted_books=(job.result or {}).get('deleted_books', 0) + len(book_ids))
+        search.remove_books(book_ids)
+
+
+def enqueue_delete(kind, target_id, requested_by, criteria):
+    return job_queue.enqueue(f'delete_{kind}', {f'{kind}_id': target_id}, requested_by=requested_by,
+                             result={'total_books': count_books(criteria), 'deleted_books': 0})
+
+
+@job_queue.task('delete_user')
+def run_delete_user(job):
+    user_id = job.payload['user_id']
+    delete_in_batches(job, user_book_criteria(user_id))
+    return {'deleted': delete_user(user_id)}
+
+
+@job_queue.task('delete_company')
+def run_delete_company(job):
+    company_id = job.payload['company_id']
+    delete_in_batches(job, company_book_criteria(company_id))
+    return {'deleted': delete_company(company_id)}
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from email_validator import EmailUndeliverableError, validate_email
+from flask import current_app
+
+
+def lookup_domain(domain, timeout):
+    # True when the domain accepts mail, False when it doesn't, None when DNS didn't answer
+    from email_validator.deliverability import validate_email_deliverability
+    try:
+        result = validate_email_deliverability(domain, domain, timeout=timeout)
+    except EmailUndeliverableError:
+        return False
+    return None if 'unknown-deliverability' in result else True
+
+
+class EmailChecker:
+    # Syntax is checked inline, without any network access. When
+    # EMAIL_CHECK_DELIVERABILITY is on, the domain's MX/A records are looked up on a
+    # background thread and cached; registrations are only refused for domains already
+    # known not to accept mail, so signup latency never waits on DNS.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.domains = OrderedDict()  # domain -> (deliverable, checked_at)
+        self.pending = set()
+        self.executor = None
+        self.pid = None
+
+    def validate(self, email):
+        # Raises EmailNotValidError (or EmailUndeliverableError) like validate_email
+        validated = validate_email(email, check_deliverability=False)
+        if current_app.config.get('EMAIL_CHECK_DELIVERABILITY', False):
+            domain = validated.ascii_domain
+            if self.deliverable(domain) is False:
+                raise EmailUndeliverableError(f'The domain name {domain} does not accept email.')
+        return validated
+
+    def deliverable(self, domain):
+        # Cached answer, or None after scheduling a lookup
+        now = time.monotonic()
+        with self.lock:
+            entry = self.domains.get(domain)
+            if entry is not None:
+                deliverable, checked_at = entry
+                ttl = current_app.config.get('EMAIL_DOMAIN_CACHE_TTL' if deliverable
+                                             else 'EMAIL_DOMAIN_NEGATIVE_CACHE_TTL', 3600)
+                if now - checked_at < ttl:
+                    self.domains.move_to_end(domain)
+                    return deliverable
+                del self.domains[domain]
+            if domain in self.pending:
+                return None
+            self.pending.add(domain)
+            executor = self._pool()
+        executor.submit(self._lookup, domain, current_app.config.get('EMAIL_DNS_TIMEOUT', 5),
+                        current_app.config.get('EMAIL_DOMAIN_CACHE_SIZE', 10000))
+        return None
+
+    def _pool(self):
+        # Called with the lock held; a new pool per process, so it survives pre-fork servers
+        if self.executor is None or self.pid != os.getpid():
+            self.executor = ThreadPoolExecutor(max_workers=current_app.config.get('EMAIL_DNS_WORKERS', 2),
+                                               thread_name_prefix='email-dns')
+            self.pid = os.getpid()
+        return self.executor
+
+    def _lookup(self, domain, timeout, max_size):
+        try:
+            deliverable = lookup_domain(domain, timeout)
+        except Exception:
+            deliverable = None
+        with self.lock:
+            self.pending.discard(domain)
+            # Unanswered lookups aren't cached, so the next signup retries them
+            if deliverable is not None:
+                self.domains[domain] = (deliverable, time.monotonic())
+                self.domains.move_to_end(domain)
+                while len(self.domains) > max_size:
+                    self.domains.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.domains.clear()
+
+
+email_checker = EmailChecker()
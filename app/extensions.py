@@ -1,12 +1,18 @@
 # app/extensions.py
 
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from app.replicas import RoutingSession
 
-db = SQLAlchemy()
-migrate = Migrate()
+# Reads can be routed to replicas; see app/replicas.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 bcrypt = Bcrypt()
-jwt=JWTManager()
\ No newline at end of file
+jwt=JWTManager()
+
+
+def init_migrate(app):
+    # Imported on demand: alembic is only needed by the `flask db` and `flask schema` commands
+    from flask_migrate import Migrate
+    Migrate(app, db)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import hashlib
+from datetime import timezone
+
+from flask import current_app, request
+from app.extensions import db
+from app.models.tombstones import Tombstone
+from app.result_cache import result_cache
+
+
+def make_etag(body):
+    # A hash of the response body itself: timestamps are stored to the second on MySQL,
+    # so two changes within a second would otherwise share an ETag
+    return hashlib.sha1(body).hexdigest()
+
+
+def serialize(data):
+    # Called when a result is built, so cached results carry their body and ETag and
+    # neither cache hits nor 304s serialize or hash again
+    body = current_app.json.dumps(data).encode('utf-8')
+    return body, make_etag(body)
+
+
+def json_response(body):
+    return current_app.response_class(body, mimetype=current_app.json.mimetype)
+
+
+def _as_utc(value):
+    # Model timestamps are naive local times (datetime.now)
+    return value.astimezone(timezone.utc).replace(microsecond=0) if value else None
+
+
+def collection_last_modified(model):
+    # Latest insert, update or deletion (tombstone) in the table. updated_at is also set on
+    # insert, and both maxima are read from the end of an index
+    def load():
+        row = db.session.execute(db.select(
+            db.func.max(model.updated_at),
+            db.select(db.func.max(Tombstone.deleted_at))
+            .where(Tombstone.table_name == model.__tablename__).scalar_subquery())).one()
+        return max((value for value in row if value), default=None)
+
+    return result_cache.get_or_set(model.__tablename__, 'last_modified', load)
+
+
+def is_not_modified(etag, last_modified):
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 7232)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return _as_utc(last_modified) <= request.if_modified_since
+    return False
+
+
+def conditional_response(etag, last_modified, build, private=False):
+    # build() is only called when the client's copy is stale
+    if is_not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response, status = build()
+        response.status_code = status
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = _as_utc(last_modified)
+    if private:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 60)
+    return response
@@ -0,0 +1,31 @@
+from flask import jsonify
+from sqlalchemy.exc import IntegrityError
+
+# Unique constraints and the 409 message for each, matched against the driver's error:
+# SQLite names the column (users.email), MySQL the key (users.email, or just 'email'
+# before 8.0.19) and PostgreSQL the constraint (users_email_key)
+UNIQUE_CONFLICTS = (
+    (('users.email', "key 'email'", 'users_email_key'), 'Email already exists'),
+    (('users.contact', "key 'contact'", 'users_contact_key'), 'Contact already exists'),
+    (('companies.name', 'ix_companies_name'), 'Company name already exists'),
+    (('books.isbn', "key 'isbn'", 'books_isbn_key'), 'A book with this ISBN already exists'),
+)
+
+
+def conflict_message(error):
+    # The 409 message for a unique constraint violation, None for other integrity errors
+    if not isinstance(error, IntegrityError):
+        return None
+    text = str(error.orig)
+    for markers, message in UNIQUE_CONFLICTS:
+        if any(marker in text for marker in markers):
+            return message
+    return None
+
+
+def integrity_error_response(error):
+    # 409 naming the duplicated field for unique violations, 500 for any other integrity error
+    message = conflict_message(error)
+    if message is None:
+        return jsonify({"error": str(error)}), 500
+    return jsonify({"error": message}), 409
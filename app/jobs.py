@@ -0,0 +1,143 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from app.extensions import db
+from app.models.jobs import Job
+
+
+class JobQueue:
+    # Jobs are rows in the jobs table, so any process sharing the database can run them
+    # and no broker is needed. Workers claim a due job with a conditional UPDATE, run its
+    # handler, and put failed jobs back with exponential backoff until max_attempts.
+
+    def __init__(self):
+        self.handlers = {}
+        self.lock = threading.Lock()
+        self.app = None
+        self.embedded = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['job_queue'] = self
+
+    def task(self, kind):
+        # Registers the handler for a kind of job; it receives the Job row
+        def register(fn):
+            self.handlers[kind] = fn
+            return fn
+        return register
+
+    def enqueue(self, kind, payload, requested_by=None, result=None):
+        if kind not in self.handlers:
+            raise LookupError(f"No handler for job kind '{kind}'")
+        job = Job(kind=kind, payload=payload, requested_by=requested_by, result=result, status='queued',
+                  attempts=0, max_attempts=current_app.config.get('JOBS_MAX_ATTEMPTS', 5), run_at=datetime.now())
+        db.session.add(job)
+        db.session.commit()
+        if current_app.config.get('JOBS_EMBEDDED_WORKER', False):
+            self.start_embedded_worker()
+        return job
+
+    def report(self, job, **progress):
+        # Handlers publish progress through the result column; it commits with their work
+        job.result = dict(job.result or {}, **progress)
+        db.session.commit()
+
+    def backoff(self, attempts):
+        base = current_app.config.get('JOBS_BACKOFF_BASE', 2)
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), current_app.config.get('JOBS_BACKOFF_MAX', 300)))
+
+    def requeue_stale(self):
+        # Jobs left running by a worker that died are retried once their lock expires
+        now = datetime.now()
+        expired = now - timedelta(seconds=current_app.config.get('JOBS_LOCK_TIMEOUT', 600))
+        stale = (Job.status == 'running', Job.locked_at < expired)
+        failed = db.session.execute(
+            db.update(Job).where(*stale, Job.attempts >= Job.max_attempts)
+            .values(status='failed', error='Worker lock expired', locked_by=None, locked_at=None,
+                    finished_at=now)).rowcount
+        requeued = db.session.execute(
+            db.update(Job).where(*stale)
+            .values(status='queued', locked_by=None, locked_at=None, run_at=now)).rowcount
+        db.session.commit()
+        return requeued + failed
+
+    def claim(self, worker_id):
+        now = datetime.now()
+        candidates = db.session.scalars(
+            db.select(Job.id).where(Job.status == 'queued', Job.run_at <= now)
+            .order_by(Job.run_at, Job.id).limit(10).with_for_update(skip_locked=True)).all()
+        for job_id in candidates:
+            # Only one worker's update matches while the job is still queued
+            claimed = db.session.execute(
+                db.update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(Job, job_id)
+        db.session.commit()
+        return None
+
+    def execute(self, job):
+        job_id = job.id
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                raise LookupError(f"No handler for job kind '{job.kind}'")
+            outcome = handler(job)
+            if outcome is not None:
+                job.result = dict(job.result or {}, **outcome)
+            job.status = 'done'
+            job.error = None
+            job.finished_at = datetime.now()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(Job, job_id)
+            job.error = str(e)
+            job.locked_by = None
+            job.locked_at = None
+            if job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                job.finished_at = datetime.now()
+            else:
+                job.status = 'queued'
+                job.run_at = datetime.now() + self.backoff(job.attempts)
+            db.session.commit()
+        return job
+
+    def work(self, burst=False, poll_interval=None, worker_id=None):
+        # Runs jobs until interrupted; in burst mode, until nothing is due
+        worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+        poll_interval = poll_interval or current_app.config.get('JOBS_POLL_INTERVAL', 1)
+        processed = 0
+        while True:
+            self.requeue_stale()
+            job = self.claim(worker_id)
+            if job is None:
+                db.session.remove()
+                if burst:
+                    return processed
+                time.sleep(poll_interval)
+                continue
+            self.execute(job)
+            processed += 1
+
+    def start_embedded_worker(self):
+        # Development convenience: a worker thread inside the web process, started on first use
+        with self.lock:
+            if self.embedded is not None and self.embedded.is_alive():
+                return
+            self.embedded = threading.Thread(target=self._run_embedded, daemon=True)
+            self.embedded.start()
+
+    def _run_embedded(self):
+        with self.app.app_context():
+            self.work()
+
+
+job_queue = JobQueue()
@@ -0,0 +1,37 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional dependency; Flask's stdlib provider is used without it
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    # orjson-backed JSON for responses. Dates still go through Flask's default()
+    # so the wire format matches the stdlib provider.
+
+    def _option(self):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._option()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        data = orjson.dumps(obj, default=self.default, option=self._option() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def init_json(app):
+    if orjson is not None and app.config.get('JSON_USE_ORJSON', True):
+        app.json = OrjsonProvider(app)
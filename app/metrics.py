@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('app.sql')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class Metrics:
+    # Per-process request and SQL metrics. A request costs two perf_counter() calls plus
+    # one dict update under a lock; each query adds a perf_counter() pair and two g updates.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}      # (endpoint, method) -> Histogram of seconds
+        self.queries = {}      # (endpoint, method) -> Histogram of queries per request
+        self.sql_seconds = {}  # (endpoint, method) -> total seconds spent in SQL
+        self.responses = {}    # (endpoint, method, status) -> count
+        self.slow_queries = 0
+        self.slow_query_threshold = None
+        self.server_timing = False
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.slow_query_threshold = app.config.get('SLOW_QUERY_THRESHOLD', 0.5)
+        self.server_timing = app.config.get('METRICS_SERVER_TIMING', False)
+        # Registered first so the latency includes the other request hooks
+        app.before_request_funcs.setdefault(None, []).insert(0, self.start_request)
+        app.after_request(self.finish_request)
+        app.extensions['metrics'] = self
+
+    def start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+
+    def finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        key = (request.endpoint or 'unmatched', request.method)
+        sql_count, sql_seconds = g.sql_count, g.sql_seconds
+        with self.lock:
+            latency = self.latency.get(key)
+            if latency is None:
+                latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.sql_seconds[key] = 0.0
+            latency.observe(elapsed)
+            self.queries[key].observe(sql_count)
+            self.sql_seconds[key] += sql_seconds
+            status_key = key + (response.status_code,)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+        if self.server_timing:
+            response.headers['Server-Timing'] = (f'app;dur={elapsed * 1000:.2f}, '
+                                                 f'db;dur={sql_seconds * 1000:.2f};desc="{sql_count} queries"')
+        return response
+
+    def record_query(self, statement, elapsed):
+        if has_request_context() and 'sql_count' in g:
+            g.sql_count += 1
+            g.sql_seconds += elapsed
+        threshold = self.slow_query_threshold
+        if threshold is not None and elapsed >= threshold:
+            with self.lock:
+                self.slow_queries += 1
+            endpoint = request.endpoint if has_request_context() else None
+            logger.warning('Slow query (%.3fs, %s): %s', elapsed, endpoint, ' '.join(statement.split())[:500])
+
+    def render(self):
+        # Prometheus text exposition format
+        with self.lock:
+            lines = ['# HELP http_request_duration_seconds Request latency by endpoint.',
+                     '# TYPE http_request_duration_seconds histogram']
+            for (endpoint, method), histogram in sorted(self.latency.items()):
+                lines.extend(histogram.render('http_request_duration_seconds',
+                                              f'endpoint="{endpoint}",method="{method}"'))
+            lines += ['# HELP http_requests_total Responses by endpoint and status code.',
+                      '# TYPE http_requests_total counter']
+            for (endpoint, method, status), count in sorted(self.responses.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+            lines += ['# HELP db_queries_per_request SQL statements executed per request.',
+                      '# TYPE db_queries_per_request histogram']
+            for (endpoint, method), histogram in sorted(self.queries.items()):
+                lines.extend(histogram.render('db_queries_per_request', f'endpoint="{endpoint}",method="{method}"'))
+            lines += ['# HELP db_query_duration_seconds_total Time spent in SQL by endpoint.',
+                      '# TYPE db_query_duration_seconds_total counter']
+            for (endpoint, method), seconds in sorted(self.sql_seconds.items()):
+                lines.append(f'db_query_duration_seconds_total{{endpoint="{endpoint}",method="{method}"}} {seconds:.6f}')
+            lines += ['# HELP db_slow_queries_total Queries slower than SLOW_QUERY_THRESHOLD.',
+                      '# TYPE db_slow_queries_total counter',
+                      f'db_slow_queries_total {self.slow_queries}']
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    metrics.record_query(statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _failed_query(exception_context):
+    # after_cursor_execute doesn't fire for failed statements, but they still cost a round trip
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_started'):
+        started = conn.info['query_started'].pop()
+        metrics.record_query(exception_context.statement or '', time.perf_counter() - started)
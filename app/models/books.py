@@ -3,6 +3,19 @@ from datetime import datetime
 
 class Book(db.Model):
     __tablename__ = 'books'
+    # Composite indexes backing the filter and sort options of the book list endpoint
+    __table_args__ = (
+        db.Index('ix_books_genre_publication_date', 'genre', 'publication_date'),
+        db.Index('ix_books_company_id_id', 'company_id', 'id'),
+        db.Index('ix_books_user_id_id', 'user_id', 'id'),
+        db.Index('ix_books_publication_date_id', 'publication_date', 'id'),
+        db.Index('ix_books_title_id', 'title', 'id'),
+        db.Index('ix_books_price', 'price'),
+        # Change feed, read in (updated_at, id) order
+        db.Index('ix_books_updated_at_id', 'updated_at', 'id'),
+        # Relevance search; a FULLTEXT index on MySQL, a plain index elsewhere
+        db.Index('ix_books_fulltext', 'title', 'description', 'genre', mysql_prefix='FULLTEXT'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(150), nullable=False)
@@ -13,9 +26,9 @@ class Book(db.Model):
     genre = db.Column(db.String(50), nullable=False)
     pages = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)  # Change feed watermark
 
     def _init_(self, title, description, price, price_unit, publication_date, isbn, genre, pages, user_id, company_id):
         super().__init__()  # Call superclass constructor
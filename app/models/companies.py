@@ -3,13 +3,17 @@ from datetime import datetime
 
 class Company(db.Model):
     __tablename__ = 'companies'
+    # Change feed, read in (updated_at, id) order
+    __table_args__ = (
+        db.Index('ix_companies_updated_at_id', 'updated_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(50), nullable=False, unique=True, index=True)  # Unique index, see register_company
     origin = db.Column(db.String(100))
     description = db.Column(db.String(200))
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)  # Change feed watermark
 
     def _init_(self, name, origin, description, user_id):
         super().__init__()  # Call superclass constructor
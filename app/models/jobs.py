@@ -0,0 +1,26 @@
+from app import db
+from datetime import datetime
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    # Workers poll for the oldest due job of a status
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done or failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    result = db.Column(db.JSON, nullable=True)  # Progress while running, the outcome once done
+    error = db.Column(db.Text(), nullable=True)
+    requested_by = db.Column(db.Integer, nullable=True)  # Not a foreign key; jobs can outlive their user
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
@@ -1,10 +1,13 @@
 from app import db
+from datetime import datetime
 
 class RevokedTokenModel(db.Model):
     __tablename__ = 'revoked_tokens'
 
     id = db.Column(db.Integer, primary_key=True)
-    jti = db.Column(db.String(120))
+    jti = db.Column(db.String(120), unique=True, index=True)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)  # Rows past this can be purged
+    revoked_at = db.Column(db.DateTime, nullable=True, default=datetime.now, index=True)  # Tokens issued up to then are revoked
 
     def _init_(self, jti):
-      self.jti=jti
\ No newline at end of file
+      self.jti=jti
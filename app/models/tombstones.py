@@ -0,0 +1,16 @@
+from app import db
+from datetime import datetime
+
+class Tombstone(db.Model):
+    __tablename__ = 'tombstones'
+    # Change feeds read the deletions of one table in (deleted_at, id) order
+    __table_args__ = (
+        db.Index('ix_tombstones_table_name_deleted_at_id', 'table_name', 'deleted_at', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)  # Not a foreign key; the row is gone
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f'<Tombstone {self.table_name} {self.row_id}>'
@@ -12,12 +12,13 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     biography = db.Column(db.Text(), nullable=True)
     user_type = db.Column(db.String(20), default='author')
-    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'))  # Moved from _init_ to class definition
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='SET NULL', use_alter=True))  # Moved from _init_ to class definition
     created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, index=True)  # Last-Modified of author expansions
     
-    # Define relationship to books authored by the user
-    books_authored = db.relationship('Book', backref='author', lazy=True)
+    # Define relationship to books authored by the user; the database deletes them
+    # together with the user (ON DELETE CASCADE) instead of the ORM, row by row
+    books_authored = db.relationship('Book', backref='author', lazy=True, passive_deletes=True)
     
     def __init__(self, first_name, last_name, email, contact, password, biography, user_type, company_id=None, image=None):
         self.first_name = first_name
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+
+from flask import current_app
+from app.compression import accepted_encoding, brotli, encode
+from app.http_cache import is_not_modified
+
+# Endpoints that aren't part of the API itself
+EXCLUDED_BLUEPRINTS = {'swagger_ui'}
+EXCLUDED_ENDPOINTS = {'static', 'home', 'serve_swagger_json'}
+PATH_TYPES = {'IntegerConverter': 'integer', 'FloatConverter': 'number'}
+
+
+def operation_summary(view):
+    doc = (view.__doc__ or '').strip()
+    return doc.splitlines()[0] if doc else view.__name__.replace('_', ' ').capitalize()
+
+
+def build_document(app):
+    # Swagger 2.0 paths for every registered API route. Operations described in the
+    # hand-written app/swagger.json (bodies, responses, descriptions) are merged in.
+    manual = {}
+    manual_path = os.path.join(app.root_path, 'swagger.json')
+    if os.path.exists(manual_path):
+        with open(manual_path) as f:
+            manual = json.load(f)
+    base_path = manual.get('basePath', '').rstrip('/')
+    manual_paths = manual.get('paths', {})
+
+    paths = {}
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        blueprint = rule.endpoint.rpartition('.')[0]
+        if rule.endpoint in EXCLUDED_ENDPOINTS or blueprint in EXCLUDED_BLUEPRINTS:
+            continue
+        path = rule.rule
+        parameters = []
+        for name, converter in rule._converters.items():
+            parameters.append({'name': name, 'in': 'path', 'required': True,
+                               'type': PATH_TYPES.get(type(converter).__name__, 'string')})
+        for name in rule.arguments:
+            path = _replace_argument(path, name)
+
+        manual_operations = manual_paths.get(path[len(base_path):] if path.startswith(base_path) else path, {})
+        view = app.view_functions[rule.endpoint]
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            operation = {
+                'operationId': rule.endpoint,
+                'tags': [blueprint or 'app'],
+                'summary': operation_summary(view),
+                'parameters': parameters,
+                'responses': {'200': {'description': 'Success'}},
+            }
+            operation.update(manual_operations.get(method.lower(), {}))
+            paths.setdefault(path, {})[method.lower()] = operation
+
+    return {
+        'swagger': '2.0',
+        'info': dict(manual.get('info', {}), title='Authors API'),
+        'basePath': '/',
+        'schemes': manual.get('schemes', ['http']),
+        'paths': paths,
+        'securityDefinitions': manual.get('securityDefinitions', {}),
+        'security': manual.get('security', []),
+    }
+
+
+def _replace_argument(path, name):
+    # /book/<int:book_id> -> /book/{book_id}
+    start = path.find('<')
+    while start != -1:
+        end = path.index('>', start)
+        if path[start + 1:end].rpartition(':')[2] == name:
+            return f'{path[:start]}{{{name}}}{path[end + 1:]}'
+        start = path.find('<', end)
+    return path
+
+
+class OpenAPIDocument:
+    # Built once per process when the app is created, then served from memory in each
+    # encoding with a strong ETag per representation
+
+    def __init__(self):
+        self.variants = {}
+
+    def init_app(self, app):
+        body = json.dumps(build_document(app), sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha1(body).hexdigest()
+        self.variants = {'identity': (body, digest), 'gzip': (encode(body, 'gzip', level=9), f'{digest}-gzip')}
+        if brotli is not None:
+            self.variants['br'] = (encode(body, 'br', brotli_quality=11), f'{digest}-br')
+        app.extensions['openapi'] = self
+
+    def response(self):
+        encoding = accepted_encoding()
+        body, etag = self.variants.get(encoding) or self.variants['identity']
+        if is_not_modified(etag, None):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(body, mimetype='application/json')
+            if encoding in self.variants and encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 60)
+        return response
+
+
+openapi = OpenAPIDocument()
@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+from app.extensions import db
+from app.serializers import encode_value
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    # Opaque, URL-safe token clients pass back untouched as ?cursor=
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+    if not isinstance(values, dict) or not isinstance(values.get('id'), int):
+        raise PaginationError('Invalid cursor')
+    return values
+
+
+def get_page_size():
+    default = current_app.config.get('PAGINATION_DEFAULT_PAGE_SIZE', 50)
+    maximum = current_app.config.get('PAGINATION_MAX_PAGE_SIZE', 200)
+    limit = request.args.get('limit', default)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be greater than 0')
+    return min(limit, maximum)
+
+
+def get_sort(model, sortable):
+    # ?sort=name for ascending, ?sort=-name for descending
+    sort = request.args.get('sort')
+    if not sort:
+        return 'id', False
+    descending = sort.startswith('-')
+    name = sort.lstrip('-')
+    if name not in sortable:
+        raise PaginationError(f"Cannot sort by '{name}'")
+    return name, descending
+
+
+def get_projection(schema, extra=()):
+    # Only the requested columns are selected; id is always kept for the cursor
+    fields = request.args.get('fields')
+    if not fields:
+        names = list(schema.fields)
+    else:
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in names if name not in schema.field_set]
+        if unknown:
+            raise PaginationError(f"Unknown fields: {', '.join(unknown)}")
+    if 'id' not in names:
+        names.insert(0, 'id')
+    names.extend(name for name in extra if name not in names)
+    return schema.columns(names)
+
+
+def _decode_value(column, value):
+    try:
+        python_type = column.type.python_type
+        if python_type in (date, datetime) and value is not None:
+            return python_type.fromisoformat(value)
+    except (NotImplementedError, TypeError, ValueError):
+        raise PaginationError('Invalid cursor')
+    return value
+
+
+def _sort_key(sort_name, descending):
+    return f'-{sort_name}' if descending else sort_name
+
+
+def _keyset_criterion(model, sort_name, descending, cursor):
+    values = decode_cursor(cursor)
+    # A cursor is only valid for the ordering that produced it
+    if values.get('sort', 'id') != _sort_key(sort_name, descending):
+        raise PaginationError('Cursor does not match the requested sort')
+    if sort_name == 'id':
+        return model.id < values['id'] if descending else model.id > values['id']
+
+    if 'value' not in values:
+        raise PaginationError('Invalid cursor')
+    column = getattr(model, sort_name)
+    value = _decode_value(column, values['value'])
+    if descending:
+        return or_(column < value, and_(column == value, model.id < values['id']))
+    return or_(column > value, and_(column == value, model.id > values['id']))
+
+
+def paginate(schema, *criteria, sortable=('id',), include=()):
+    model = schema.model
+    limit = get_page_size()
+    sort_name, descending = get_sort(model, sortable)
+
+    # Order by the sort key with id as a tie-breaker so the keyset is total
+    order_by = [model.id.desc() if descending else model.id]
+    if sort_name != 'id':
+        sort_column = getattr(model, sort_name)
+        order_by.insert(0, sort_column.desc() if descending else sort_column)
+
+    columns = get_projection(schema, extra=(sort_name,) + tuple(include))
+    stmt = db.select(*columns).order_by(*order_by).limit(limit + 1)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        stmt = stmt.where(_keyset_criterion(model, sort_name, descending, cursor))
+    if criteria:
+        stmt = stmt.where(*criteria)
+
+    # Fetch one extra row to know whether another page exists
+    rows = db.session.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        values = {'id': last['id']}
+        if sort_name != 'id' or descending:
+            values['sort'] = _sort_key(sort_name, descending)
+        if sort_name != 'id':
+            values['value'] = encode_value(last[sort_name])
+        next_cursor = encode_cursor(values)
+
+    return schema.dump_rows(rows), next_cursor
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+from flask import current_app
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verify(password_hash, password):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+def _pool_context():
+    # The pool starts workers on demand from request threads; forking there could copy a lock
+    # another thread holds (logging, caches), so workers come from a forkserver or are spawned
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class PasswordHasher:
+    # Runs bcrypt in a bounded process pool so login storms don't pin the request workers.
+    # The pool is created lazily per process, which keeps it safe across pre-fork servers.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+        self.pid = None
+
+    def _pool(self):
+        with self.lock:
+            if self.executor is None or self.pid != os.getpid():
+                workers = current_app.config.get('PASSWORD_HASH_WORKERS', 2)
+                queue_size = current_app.config.get('PASSWORD_HASH_QUEUE_SIZE', 64)
+                self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+                self.slots = threading.BoundedSemaphore(queue_size)
+                self.pid = os.getpid()
+            return self.executor, self.slots
+
+    def _run(self, fn, *args):
+        # PASSWORD_HASH_WORKERS = 0 hashes inline on the request thread
+        if not current_app.config.get('PASSWORD_HASH_WORKERS', 2):
+            return fn(*args)
+        executor, slots = self._pool()
+        timeout = current_app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        if not slots.acquire(timeout=timeout):
+            raise PasswordHasherBusy('Too many password operations in progress')
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        # The slot is held until the job finishes, even when the request stops waiting for it,
+        # so PASSWORD_HASH_QUEUE_SIZE bounds the work actually queued in the pool
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise PasswordHasherBusy('Password operation timed out')
+
+    def hash(self, password):
+        return self._run(_hash, password, current_app.config.get('BCRYPT_LOG_ROUNDS', 12))
+
+    def verify(self, password_hash, password):
+        return self._run(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # bcrypt hashes look like $2b$<cost>$<salt+digest>
+        try:
+            cost = int(password_hash.split('$')[2])
+        except (IndexError, ValueError):
+            return True
+        return cost != current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+            self.executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,141 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify, request
+from flask_jwt_extended import decode_token
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(value):
+    # '5/minute' -> (5, 60)
+    count, _, period = value.partition('/')
+    if period not in PERIODS:
+        raise ValueError(f"Invalid rate limit '{value}'")
+    return int(count), PERIODS[period]
+
+
+def sliding_window(previous, current, limit, window, now):
+    # Sliding window counter: the previous fixed window's count is weighted by how much
+    # of it still overlaps the sliding window. Returns 0 when allowed, else seconds to wait.
+    elapsed = (now % window) / window
+    if previous * (1 - elapsed) + current < limit:
+        return 0
+    if current >= limit or not previous:
+        return window * (1 - elapsed)
+    # Time until enough of the previous window has slid out to admit one more request
+    needed = 1 - (limit - 1 - current) / previous
+    return max(needed - elapsed, 0) * window
+
+
+class MemoryStore:
+    # Per-process counters: three numbers per key, in a bounded LRU
+
+    def __init__(self, max_keys=10000):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.max_keys = max_keys
+
+    def hit(self, key, limit, window, now):
+        index = int(now // window)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < index - 1:
+                entry = [index, 0, 0]
+            elif entry[0] == index - 1:
+                entry = [index, entry[2], 0]
+            retry_after = sliding_window(entry[1], entry[2], limit, window, now)
+            if not retry_after:
+                entry[2] += 1
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+        return retry_after
+
+
+class SharedStore:
+    # Counters shared by every worker, in a Redis-compatible server: one integer per
+    # key and fixed window, expiring once it can no longer weigh on the sliding window
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key, limit, window, now):
+        index = int(now // window)
+        current_key = f'{self.prefix}{key}:{index}'
+        pipe = self.client.pipeline()
+        pipe.get(f'{self.prefix}{key}:{index - 1}')
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2)
+        previous, current, _ = pipe.execute()
+        retry_after = sliding_window(int(previous or 0), current - 1, limit, window, now)
+        if retry_after:
+            self.client.decr(current_key)
+        return retry_after
+
+
+class RateLimiter:
+    # Checked in before_request, ahead of JWT verification, database reads and bcrypt,
+    # against the per-endpoint limits in RATE_LIMITS
+
+    def __init__(self):
+        self.store = None
+        self.rules = {}
+
+    def init_app(self, app):
+        if not app.config.get('RATE_LIMIT_ENABLED', True):
+            return
+        storage = app.config.get('RATE_LIMIT_STORAGE', 'memory')
+        if storage == 'memory':
+            self.store = MemoryStore(app.config.get('RATE_LIMIT_MAX_KEYS', 10000))
+        elif storage == 'redis':
+            # Optional dependency, only needed for the shared store
+            import redis
+            self.store = SharedStore(redis.Redis.from_url(app.config['RATE_LIMIT_STORAGE_URL']))
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_STORAGE '{storage}'")
+        self.rules = {endpoint: [(scope, *parse_limit(limit)) for scope, limit in limits.items()]
+                      for endpoint, limits in app.config.get('RATE_LIMITS', {}).items()}
+        app.before_request(self.check)
+        app.extensions['rate_limiter'] = self
+
+    def scope_key(self, scope):
+        if scope == 'ip':
+            return request.remote_addr
+        if scope == 'email':
+            data = request.get_json(silent=True)
+            email = data.get('email') if isinstance(data, dict) else None
+            return email.strip().lower() if isinstance(email, str) else None
+        if scope == 'identity':
+            # Signature and expiry only; revocation is left to the route itself
+            header = request.headers.get('Authorization', '')
+            if not header.startswith('Bearer '):
+                return None
+            try:
+                return str(decode_token(header[7:])['sub'])
+            except Exception:
+                return None
+        raise ValueError(f"Unknown rate limit scope '{scope}'")
+
+    def check(self):
+        rules = self.rules.get(request.endpoint)
+        if not rules:
+            return None
+        now = time.time()
+        for scope, limit, window in rules:
+            value = self.scope_key(scope)
+            if value is None:
+                continue
+            retry_after = self.store.hit(f'{request.endpoint}:{scope}:{value}', limit, window, now)
+            if retry_after:
+                response = jsonify({'error': 'Too many requests, please try again later'})
+                response.headers['Retry-After'] = str(max(math.ceil(retry_after), 1))
+                return response, 429
+        return None
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,127 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'read_primary_until'
+
+
+class RoutingSession(Session):
+    # Sends reads to the replica picked for the current request, everything else to the primary.
+    # Flushes always go to the primary, so a GET handler that writes still writes correctly.
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            replica = g.get('db_replica')
+            if replica is not None:
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_primary(fn):
+    # Marks a GET handler that must read from the primary
+    fn.use_primary = True
+    return fn
+
+
+@contextmanager
+def primary_reads():
+    # Reads inside the block go to the primary, for results that outlive the request
+    # (cached responses, the token blocklist); a lagging replica would hand out old rows
+    replica = g.pop('db_replica', None) if has_request_context() else None
+    try:
+        yield
+    finally:
+        if replica is not None:
+            g.db_replica = replica
+
+
+class ReplicaRouter:
+
+    def __init__(self):
+        self.keys = []
+        self.cycle = None
+        self.lock = threading.Lock()
+        self.lag = {}  # bind key -> (seconds behind or None, checked at)
+
+    def init_app(self, app):
+        urls = app.config.get('READ_REPLICA_URLS') or []
+        self.keys = [f'replica_{index}' for index in range(len(urls))]
+        self.cycle = itertools.cycle(self.keys)
+        if not self.keys:
+            return
+
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        for key, url in zip(self.keys, urls):
+            binds[key] = url
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+        app.before_request(self.route_request)
+        app.after_request(self.mark_write)
+
+    def _replica_lag(self, key):
+        # Cached per replica so the probe costs one query per REPLICA_LAG_CHECK_INTERVAL
+        interval = current_app.config.get('REPLICA_LAG_CHECK_INTERVAL', 10)
+        now = time.monotonic()
+        with self.lock:
+            cached = self.lag.get(key)
+            if cached is not None and now - cached[1] < interval:
+                return cached[0]
+
+        engine = current_app.extensions['sqlalchemy'].engines[key]
+        lag = 0
+        if engine.dialect.name == 'mysql':
+            try:
+                with engine.connect() as connection:
+                    try:
+                        row = connection.execute(text('SHOW REPLICA STATUS')).mappings().first()
+                    except SQLAlchemyError:
+                        row = connection.execute(text('SHOW SLAVE STATUS')).mappings().first()
+                if row is not None:
+                    lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+            except SQLAlchemyError:
+                lag = None
+
+        with self.lock:
+            self.lag[key] = (lag, now)
+        return lag
+
+    def pick_replica(self):
+        # Round-robin over replicas, skipping any that lag more than REPLICA_MAX_LAG
+        max_lag = current_app.config.get('REPLICA_MAX_LAG', 5)
+        for _ in range(len(self.keys)):
+            with self.lock:
+                key = next(self.cycle)
+            lag = self._replica_lag(key)
+            if lag is not None and lag <= max_lag:
+                return key
+        return None
+
+    def route_request(self):
+        if request.method not in SAFE_METHODS:
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if view is None or getattr(view, 'use_primary', False):
+            return
+        # Read-your-writes: clients that just wrote keep reading from the primary for a while
+        try:
+            if float(request.cookies.get(STICKY_COOKIE, 0)) > time.time():
+                return
+        except ValueError:
+            pass
+        g.db_replica = self.pick_replica()
+
+    def mark_write(self, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            window = current_app.config.get('REPLICA_READ_YOUR_WRITES_WINDOW', 5)
+            response.set_cookie(STICKY_COOKIE, str(time.time() + window), max_age=window, httponly=True)
+        return response
+
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,211 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.models.books import Book
+from app.models.companies import Company
+from app.models.users import User
+from app.replicas import primary_reads
+
+MISSING = object()
+
+
+class MemoryBackend:
+    # In-process LRU with per-entry TTL. Invalidation is only seen by this process,
+    # so multi-worker deployments should use the shared backend.
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def generation(self, namespace):
+        with self.lock:
+            return self.generations.get(namespace, 0)
+
+    def bump(self, namespace):
+        with self.lock:
+            self.generations[namespace] = self.generations.get(namespace, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SharedBackend:
+    # Any client with Redis-style get/set(ex=)/incr, e.g. redis.Redis or a local stand-in.
+    # Namespace generations live in the shared store, so every worker sees invalidations.
+
+    def __init__(self, client, prefix='authors_api:cache:'):
+        self.client = client
+        self.prefix = prefix
+        self.evictions = 0  # Evictions happen inside the shared store
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def generation(self, namespace):
+        raw = self.client.get(f'{self.prefix}gen:{namespace}')
+        return int(raw) if raw is not None else 0
+
+    def bump(self, namespace):
+        self.client.incr(f'{self.prefix}gen:{namespace}')
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class ResultCache:
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        backend = app.config.get('RESULT_CACHE_BACKEND', 'memory')
+        self.ttl = app.config.get('RESULT_CACHE_TTL', 30)
+        if backend == 'memory':
+            self.backend = MemoryBackend(app.config.get('RESULT_CACHE_MAX_ENTRIES', 2048))
+        elif backend == 'redis':
+            # Optional dependency, only needed for the shared backend
+            import redis
+            self.backend = SharedBackend(redis.Redis.from_url(app.config['RESULT_CACHE_URL']))
+        elif backend == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown RESULT_CACHE_BACKEND '{backend}'")
+        app.extensions['result_cache'] = self
+
+    def request_key(self):
+        # Endpoint plus the query parameters, independent of their order
+        args = sorted(request.args.items(multi=True))
+        return f'{request.endpoint}?{args!r}'
+
+    def get_or_set(self, namespace, key, build):
+        if self.backend is None:
+            return build()
+        full_key = f'{namespace}:{self.backend.generation(namespace)}:{key}'
+        value = self.backend.get(full_key)
+        if value is not MISSING:
+            with self.lock:
+                self.hits += 1
+            return value
+        with self.lock:
+            self.misses += 1
+        # Cached results are served to everyone until the TTL, so they are built from the
+        # primary: a lagging replica would store pre-commit rows under the new generation
+        with primary_reads():
+            value = build()
+        self.backend.set(full_key, value, self.ttl)
+        return value
+
+    def invalidate(self, *namespaces):
+        # Bumping the generation orphans every key of the namespace; the LRU/TTL reclaims them
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            self.backend.bump(namespace)
+        with self.lock:
+            self.invalidations += len(namespaces)
+
+    def stats(self):
+        backend = self.backend
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'backend': type(backend).__name__ if backend is not None else None,
+                'entries': len(backend) if backend is not None else 0,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / requests, 4) if requests else 0.0,
+                'evictions': backend.evictions if backend is not None else 0,
+                'invalidations': self.invalidations,
+            }
+
+
+result_cache = ResultCache()
+
+
+# Namespaces invalidated by writes to each model
+invalidated_namespaces = {}
+
+
+def register_invalidation(model, *namespaces):
+    # Writes mark namespaces during the flush; they are invalidated once the transaction
+    # commits, so a concurrent reader can't re-cache the old rows in between
+    def mark(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault('result_cache_dirty', set()).update(namespaces)
+
+    invalidated_namespaces[model] = namespaces
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, name, mark)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_bulk_writes(orm_execute_state):
+    # Bulk insert/update/delete statements skip the mapper events above
+    if orm_execute_state.is_select or orm_execute_state.bind_mapper is None:
+        return
+    namespaces = invalidated_namespaces.get(orm_execute_state.bind_mapper.class_)
+    if namespaces:
+        orm_execute_state.session.info.setdefault('result_cache_dirty', set()).update(namespaces)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    dirty = session.info.pop('result_cache_dirty', None)
+    if dirty:
+        result_cache.invalidate(*dirty)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop('result_cache_dirty', None)
+
+
+register_invalidation(Book, 'books')
+# Book responses can embed author and company names (?expand=)
+register_invalidation(Company, 'companies', 'books')
+register_invalidation(User, 'users', 'books')
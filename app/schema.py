@@ -0,0 +1,33 @@
+from flask import current_app
+from app.extensions import db
+
+
+def check_schema():
+    # Compares the database with the models and the migration head without changing
+    # anything; returns a list of problems, empty when the schema is current.
+    # Alembic is imported here so serving processes never load it.
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    problems = []
+    config = current_app.extensions['migrate'].migrate.get_config()
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with db.engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={'compare_type': True})
+        current = set(context.get_current_heads())
+        if current != heads:
+            problems.append(f"Database is at revision {', '.join(sorted(current)) or 'none'}, "
+                            f"migrations head is {', '.join(sorted(heads))}; run `flask db upgrade`")
+        for diff in compare_metadata(context, db.metadata):
+            problems.append(f'Schema differs from the models: {describe(diff)}')
+    return problems
+
+
+def describe(diff):
+    # compare_metadata yields tuples, or lists of tuples for column modifications
+    if isinstance(diff, list):
+        return '; '.join(describe(item) for item in diff)
+    action, *args = diff
+    names = [getattr(arg, 'name', None) for arg in args]
+    return f"{action} {' '.join(str(name) for name in names if name)}"
@@ -0,0 +1,176 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from sqlalchemy.dialects.mysql import match
+from app.extensions import db
+from app.models.books import Book
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+STOPWORDS = frozenset(['a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+                       'is', 'it', 'of', 'on', 'or', 'that', 'the', 'to', 'with'])
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+def book_text(title, description, genre):
+    return ' '.join(part for part in (title, description, genre) if part)
+
+
+class InvertedIndex:
+    # In-process inverted index with BM25 ranking, used for SQLite and testing
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {book_id: term frequency}
+        self.doc_terms = {}  # book_id -> terms, so removal only touches its own postings
+        self.doc_lengths = {}
+        self.total_length = 0
+        self.built = False
+        self.lock = threading.RLock()
+
+    def build(self):
+        with self.lock:
+            if self.built:
+                return
+            stmt = db.select(Book.id, Book.title, Book.description, Book.genre)
+            for row in db.session.execute(stmt.execution_options(yield_per=1000)):
+                self._add(row.id, book_text(row.title, row.description, row.genre))
+            self.built = True
+
+    def _add(self, book_id, text):
+        terms = Counter(tokenize(text))
+        for term, frequency in terms.items():
+            self.postings[term][book_id] = frequency
+        length = sum(terms.values())
+        self.doc_terms[book_id] = tuple(terms)
+        self.doc_lengths[book_id] = length
+        self.total_length += length
+
+    def _remove(self, book_id):
+        length = self.doc_lengths.pop(book_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(book_id):
+            docs = self.postings[term]
+            docs.pop(book_id, None)
+            if not docs:
+                del self.postings[term]
+
+    def index_book(self, book):
+        with self.lock:
+            # Until the first search builds the index from the database there is nothing to update
+            if not self.built:
+                return
+            self._remove(book.id)
+            self._add(book.id, book_text(book.title, book.description, book.genre))
+
+    def remove_book(self, book_id):
+        with self.lock:
+            if self.built:
+                self._remove(book_id)
+
+    def remove_books(self, book_ids):
+        with self.lock:
+            if self.built:
+                for book_id in book_ids:
+                    self._remove(book_id)
+
+    def index_isbns(self, isbns):
+        # Bulk inserts don't return ids, so newly imported rows are looked up by isbn
+        with self.lock:
+            if not self.built:
+                return
+            stmt = db.select(Book.id, Book.title, Book.description, Book.genre).where(Book.isbn.in_(isbns))
+            for row in db.session.execute(stmt):
+                self._remove(row.id)
+                self._add(row.id, book_text(row.title, row.description, row.genre))
+
+    def search(self, query, limit):
+        self.build()
+        terms = set(tokenize(query))
+        with self.lock:
+            count = len(self.doc_lengths)
+            if not count or not terms:
+                return []
+            average_length = self.total_length / count
+            scores = defaultdict(float)
+            for term in terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                for book_id, frequency in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[book_id] / average_length)
+                    scores[book_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+class MySQLFullTextIndex:
+    # Delegates to the FULLTEXT index on books(title, description, genre)
+
+    def index_book(self, book):
+        pass
+
+    def remove_book(self, book_id):
+        pass
+
+    def remove_books(self, book_ids):
+        pass
+
+    def index_isbns(self, isbns):
+        pass
+
+    def search(self, query, limit):
+        score = match(Book.title, Book.description, Book.genre, against=query).in_natural_language_mode()
+        stmt = (db.select(Book.id, score.label('score'))
+                .where(score > 0)
+                .order_by(score.desc(), Book.id)
+                .limit(limit))
+        return [(row.id, float(row.score)) for row in db.session.execute(stmt)]
+
+
+class BookSearch:
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # 'auto' picks the FULLTEXT index on MySQL and the in-process index elsewhere
+        backend = app.config.get('SEARCH_BACKEND', 'auto')
+        if backend == 'auto':
+            uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+            backend = 'mysql' if uri.startswith('mysql') else 'memory'
+        if backend == 'mysql':
+            self.backend = MySQLFullTextIndex()
+        elif backend == 'memory':
+            self.backend = InvertedIndex()
+        else:
+            raise ValueError(f"Unknown SEARCH_BACKEND '{backend}'")
+        app.extensions['search'] = self
+
+    def index_book(self, book):
+        self.backend.index_book(book)
+
+    def remove_book(self, book_id):
+        self.backend.remove_book(book_id)
+
+    def remove_books(self, book_ids):
+        self.backend.remove_books(book_ids)
+
+    def index_isbns(self, isbns):
+        self.backend.index_isbns(isbns)
+
+    def search(self, query, limit):
+        return self.backend.search(query, limit)
+
+
+search = BookSearch()
@@ -0,0 +1,46 @@
+from datetime import date, datetime
+
+from app.extensions import db
+from app.models.books import Book
+from app.models.companies import Company
+from app.models.jobs import Job
+from app.models.users import User
+
+
+def encode_value(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+class Schema:
+    # Public fields of a model, dumped either from ORM objects or straight from Row
+    # tuples selected with just those columns (no ORM hydration)
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.field_set = frozenset(fields)
+
+    def columns(self, names=None):
+        return [getattr(self.model, name) for name in (names or self.fields)]
+
+    def select(self, *extra):
+        return db.select(*self.columns(), *extra)
+
+    def dump(self, obj):
+        return {name: encode_value(getattr(obj, name)) for name in self.fields}
+
+    def dump_row(self, row):
+        # Columns selected beyond the schema (timestamps, sort keys) are left out
+        field_set = self.field_set
+        return {key: encode_value(value) for key, value in row._mapping.items() if key in field_set}
+
+    def dump_rows(self, rows):
+        return [self.dump_row(row) for row in rows]
+
+
+book_schema = Schema(Book, ('id', 'title', 'description', 'price', 'price_unit', 'pages',
+                            'publication_date', 'isbn', 'genre', 'user_id', 'company_id'))
+user_schema = Schema(User, ('id', 'email', 'first_name', 'last_name', 'contact', 'user_type', 'biography'))
+company_schema = Schema(Company, ('id', 'name', 'origin', 'description', 'user_id'))
+job_schema = Schema(Job, ('id', 'kind', 'status', 'attempts', 'max_attempts', 'payload', 'result', 'error',
+                          'requested_by', 'run_at', 'created_at', 'finished_at'))
@@ -0,0 +1,31 @@
+from flask import Response, current_app, stream_with_context
+from app.extensions import db
+from app.pagination import get_projection
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_ndjson(request):
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_ndjson(schema, *criteria):
+    # Projection is resolved up front so a bad ?fields= fails before streaming starts
+    stmt = db.select(*get_projection(schema)).order_by(schema.model.id)
+    if criteria:
+        stmt = stmt.where(*criteria)
+    yield_per = current_app.config.get('EXPORT_YIELD_PER', 1000)
+    dumps = current_app.json.dumps
+
+    def generate():
+        # yield_per implies stream_results, i.e. a server-side cursor on MySQL,
+        # so only one batch of rows is held in memory at a time
+        result = db.session.execute(stmt.execution_options(yield_per=yield_per))
+        try:
+            for row in result:
+                yield dumps(schema.dump_row(row)) + '\n'
+        finally:
+            result.close()
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
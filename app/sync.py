@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+from app.extensions import db
+from app.models.tombstones import Tombstone
+from app.pagination import PaginationError, encode_cursor, decode_cursor, get_page_size, get_projection
+from app.serializers import encode_value
+
+
+class WatermarkExpired(Exception):
+    pass
+
+
+def record_deletions(table_name, row_ids):
+    # Tombstones tell sync clients which of their rows to drop; the caller owns the transaction
+    if row_ids:
+        now = datetime.now()
+        db.session.execute(db.insert(Tombstone),
+                           [{'table_name': table_name, 'row_id': row_id, 'deleted_at': now} for row_id in row_ids])
+
+
+def purge_tombstones():
+    # Clients whose watermark is older than the retention window resync from scratch instead
+    expired = datetime.now() - timedelta(days=current_app.config.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    deleted = db.session.execute(
+        db.delete(Tombstone).where(Tombstone.deleted_at < expired).execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    return deleted
+
+
+def _timestamp(value):
+    # Model timestamps are naive local times (datetime.now)
+    if not isinstance(value, str):
+        raise ValueError(value)
+    stamp = datetime.fromisoformat(value)
+    return stamp.astimezone().replace(tzinfo=None) if stamp.tzinfo else stamp
+
+
+def get_position(bound):
+    # Where the client stopped: ?cursor= from the previous page, ?updated_since= for a client
+    # that only kept a timestamp, or nothing for a first full sync
+    cursor = request.args.get('cursor')
+    since = request.args.get('updated_since')
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            position = {'at': _timestamp(values['at']) if values.get('at') else None, 'id': values['id'],
+                        'deleted_at': _timestamp(values.get('deleted_at')), 'deleted_id': values.get('deleted_id')}
+        except ValueError:
+            raise PaginationError('Invalid cursor')
+        if not isinstance(position['deleted_id'], int):
+            raise PaginationError('Invalid cursor')
+    elif since:
+        try:
+            since = _timestamp(since)
+        except ValueError:
+            raise PaginationError('updated_since must be an ISO 8601 datetime')
+        position = {'at': since, 'id': 0, 'deleted_at': since, 'deleted_id': 0}
+    else:
+        # Nothing to delete on the client yet, so deletions are followed from now on
+        return {'at': None, 'id': 0, 'deleted_at': bound, 'deleted_id': 0}
+
+    retention = current_app.config.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+    if position['deleted_at'] < datetime.now() - timedelta(days=retention):
+        raise WatermarkExpired('Watermark is older than the deletion history; sync again without one')
+    return position
+
+
+def _after(column, id_column, at, row_id):
+    return or_(column > at, and_(column == at, id_column > row_id))
+
+
+def changes(schema, table_name):
+    # One page of a change feed: rows inserted or updated after the client's position and the
+    # ids of rows deleted after it, both in (timestamp, id) order over indexes. The feed stops
+    # SYNC_SETTLE_SECONDS in the past so rows from transactions that commit late, or reach a
+    # replica late, are not skipped; they appear on a later sync instead.
+    model = schema.model
+    limit = get_page_size()
+    bound = datetime.now() - timedelta(seconds=current_app.config.get('SYNC_SETTLE_SECONDS', 10))
+    position = get_position(bound)
+
+    stmt = db.select(*get_projection(schema, extra=('updated_at',))).where(model.updated_at <= bound)
+    if position['at'] is not None:
+        stmt = stmt.where(_after(model.updated_at, model.id, position['at'], position['id']))
+    rows = db.session.execute(stmt.order_by(model.updated_at, model.id).limit(limit + 1)).all()
+
+    tombstones = db.session.execute(
+        db.select(Tombstone.id, Tombstone.row_id, Tombstone.deleted_at)
+        .where(Tombstone.table_name == table_name, Tombstone.deleted_at <= bound,
+               _after(Tombstone.deleted_at, Tombstone.id, position['deleted_at'], position['deleted_id']))
+        .order_by(Tombstone.deleted_at, Tombstone.id).limit(limit + 1)).all()
+
+    # Fetch one extra row of each to know whether the client should ask again right away
+    has_more = len(rows) > limit or len(tombstones) > limit
+    rows, tombstones = rows[:limit], tombstones[:limit]
+    if rows:
+        position.update(at=rows[-1].updated_at, id=rows[-1].id)
+    if tombstones:
+        position.update(deleted_at=tombstones[-1].deleted_at, deleted_id=tombstones[-1].id)
+
+    return {
+        'changed': schema.dump_rows(rows),
+        'deleted': [tombstone.row_id for tombstone in tombstones],
+        'next': encode_cursor({key: encode_value(value) for key, value in position.items()}),
+        'has_more': has_more,
+    }
@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app
+from app.extensions import db
+from app.models.users import User
+
+# The only columns authorization checks need; everything else is loaded on demand
+AuthUser = namedtuple('AuthUser', ['id', 'user_type', 'company_id'])
+
+
+class UserCache:
+    # Short-lived LRU of AuthUser rows shared by requests in this process.
+    # Flask-JWT-Extended already keeps the loaded user on g for the rest of the
+    # request, so each protected request costs at most one lookup here.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, user_id):
+        ttl = current_app.config.get('CURRENT_USER_CACHE_TTL', 60)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and now - entry[1] < ttl:
+                self.entries.move_to_end(user_id)
+                return entry[0]
+
+        row = db.session.execute(
+            db.select(User.id, User.user_type, User.company_id).where(User.id == user_id)).first()
+        if row is None:
+            self.invalidate(user_id)
+            return None
+
+        user = AuthUser(*row)
+        with self.lock:
+            self.entries[user_id] = (user, now)
+            self.entries.move_to_end(user_id)
+            if len(self.entries) > current_app.config.get('CURRENT_USER_CACHE_SIZE', 1024):
+                self.entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache()
+
+
+def role_claims(user):
+    # Authorization fields embedded in access tokens
+    return {'user_type': user.user_type, 'company_id': user.company_id}
+
+
+def load_current_user(jwt_header, jwt_data):
+    # Access tokens carry the role claims, so only older tokens and refresh tokens hit the cache
+    if 'user_type' in jwt_data:
+        return AuthUser(jwt_data['sub'], jwt_data['user_type'], jwt_data.get('company_id'))
+    return user_cache.get(jwt_data['sub'])
@@ -0,0 +1,303 @@
+"""Load-test the hot API endpoints and compare them against a stored baseline.
+
+Usage: python benchmarks/api_load.py [--preset small|medium|large] [--books N] [--users N]
+                                     [--driver client|wsgi|both] [--concurrency 1,4,16]
+                                     [--requests 200] [--database-url URL]
+                                     [--baseline benchmarks/baseline.json] [--save-baseline]
+
+Seeds a scratch database (SQLite in a temporary file unless --database-url points at
+a MySQL-compatible server; its tables are dropped and recreated), then drives each
+scenario through the Flask test client and through a threaded WSGI server at every
+concurrency level. Reports p50/p95/p99 latency, throughput and SQL queries per request
+(from the Server-Timing header). Exits non-zero when a scenario's p95 is more than
+--tolerance slower than the baseline, or when it runs more queries per request.
+Latency baselines are machine specific, so save one per machine with --save-baseline.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import create_app
+from app.extensions import db
+from app.models.books import Book
+from app.models.companies import Company
+from app.models.users import User
+from app.passwords import password_hasher
+from config import TestingConfig, config_by_name
+
+PRESETS = {
+    'small': {'books': 1000, 'users': 100},
+    'medium': {'books': 100000, 'users': 10000},
+    'large': {'books': 1000000, 'users': 10000},
+}
+GENRES = ('fiction', 'history', 'science', 'poetry', 'travel')
+PASSWORD = 'benchmark'
+CHUNK_SIZE = 10000
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class BenchmarkConfig(TestingConfig):
+    # Testing defaults plus the Server-Timing header the query counts are read from
+    METRICS_SERVER_TIMING = True
+    SLOW_QUERY_THRESHOLD = None
+    RATE_LIMIT_ENABLED = False
+
+
+def seed(users, books, reset):
+    if reset:
+        db.drop_all()
+    db.create_all()
+    # One hash for everyone; hashing 10k passwords would dominate the seeding time
+    password_hash = password_hasher.hash(PASSWORD)
+    companies = max(users // 10, 1)
+    for start in range(0, users, CHUNK_SIZE):
+        db.session.execute(db.insert(User), [{
+            'first_name': 'User', 'last_name': str(i), 'email': f'user{i}@example.com', 'contact': str(i),
+            'password_hash': password_hash, 'biography': '', 'user_type': 'admin' if i == 0 else 'author',
+        } for i in range(start, min(start + CHUNK_SIZE, users))])
+    # users[i] owns companies[i] for the first `companies` users
+    db.session.execute(db.insert(Company), [{
+        'name': f'Company {i}', 'origin': 'UG', 'description': 'A benchmark company', 'user_id': i + 1,
+    } for i in range(companies)])
+    for start in range(0, books, CHUNK_SIZE):
+        db.session.execute(db.insert(Book), [{
+            'title': f'Book {i}', 'description': f'A {GENRES[i % len(GENRES)]} benchmark book', 'price': i % 1000,
+            'price_unit': 'UGX', 'pages': 100 + i % 400, 'publication_date': date(2000 + i % 25, 1 + i % 12, 1),
+            'isbn': f'isbn-{i}', 'genre': GENRES[i % len(GENRES)],
+            'user_id': 1 + i % companies, 'company_id': 1 + i % companies,
+        } for i in range(start, min(start + CHUNK_SIZE, books))])
+        db.session.commit()
+    db.session.commit()
+    return companies
+
+
+class TestClientDriver:
+    name = 'client'
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers.get('Server-Timing', ''), response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class QuietHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so each worker thread reuses its connection
+
+    def log_request(self, *args):
+        pass
+
+
+class WSGIDriver:
+    name = 'wsgi'
+
+    def __init__(self, app):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        try:
+            parsed = json.loads(data) if data else None
+        except ValueError:
+            parsed = None
+        return response.status, response.getheader('Server-Timing', ''), parsed
+
+    def close(self):
+        self.server.shutdown()
+
+
+def login(driver, email):
+    status, _, body = driver.request('POST', '/api/v1/auth/login', {'email': email, 'password': PASSWORD})
+    assert status == 200, (email, status, body)
+    return {'Authorization': f"Bearer {body['access_token']}"}
+
+
+def scenarios(driver, users, books, companies):
+    admin = login(driver, 'user0@example.com')
+    author = login(driver, 'user1@example.com')
+    isbns = itertools.count()
+    run_id = os.getpid() * 1000 + random.randrange(1000)
+
+    def register_book():
+        return ('POST', '/api/v1/book/register', {
+            'title': 'Benchmark', 'description': 'Registered by the benchmark', 'price': 1, 'price_unit': 'UGX',
+            'pages': 10, 'publication_date': '2024-01-01', 'isbn': f'bench-{driver.name}-{run_id}-{next(isbns)}',
+            'genre': 'fiction', 'company_id': 1}, author)
+
+    return {
+        'login': lambda: ('POST', '/api/v1/auth/login',
+                          {'email': f'user{random.randrange(users)}@example.com', 'password': PASSWORD}, None),
+        'get_all_books': lambda: ('GET', f'/api/v1/book/?limit=50&genre={random.choice(GENRES)}', None, None),
+        'get_book': lambda: ('GET', f'/api/v1/book/book/{random.randrange(1, books + 1)}', None, None),
+        'register_book': register_book,
+        'get_company': lambda: ('GET', f'/api/v1/company/company/{random.randrange(1, companies + 1)}', None, admin),
+    }
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of sorted values
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+
+def measure(driver, make_request, concurrency, requests):
+    def worker(count):
+        samples = []
+        for _ in range(count):
+            method, path, body, headers = make_request()
+            started = time.perf_counter()
+            status, server_timing, _ = driver.request(method, path, body, headers)
+            elapsed = time.perf_counter() - started
+            match = SERVER_TIMING_QUERIES.search(server_timing)
+            samples.append((elapsed, int(match.group(1)) if match else 0, status < 400))
+        return samples
+
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = [sample for result in executor.map(worker, shares) for sample in result]
+    wall = time.perf_counter() - started
+
+    latencies = sorted(sample[0] for sample in samples)
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'rps': round(len(samples) / wall, 1),
+        'queries': round(sum(sample[1] for sample in samples) / len(samples), 2),
+        'errors': sum(1 for sample in samples if not sample[2]),
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if result['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {result['p95_ms']}ms vs baseline {expected['p95_ms']}ms")
+        # Cache hits make the average drift a little; an N+1 adds whole queries per row
+        if result['queries'] > expected['queries'] + max(0.5, expected['queries'] * 0.1):
+            regressions.append(f"{key}: {result['queries']} queries/request vs baseline {expected['queries']}")
+        if result['errors'] > expected.get('errors', 0):
+            regressions.append(f"{key}: {result['errors']} errors vs baseline {expected.get('errors', 0)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small', help='seed volume')
+    parser.add_argument('--books', type=int, help='books to seed (overrides the preset)')
+    parser.add_argument('--users', type=int, help='users to seed (overrides the preset)')
+    parser.add_argument('--driver', choices=('client', 'wsgi', 'both'), default='both')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma separated thread counts')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and concurrency level')
+    parser.add_argument('--scenarios', help='comma separated subset of the scenarios to run')
+    parser.add_argument('--database-url', help='scratch database to seed (default: temporary SQLite file)')
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 slowdown against the baseline')
+    args = parser.parse_args()
+
+    users = args.users or PRESETS[args.preset]['users']
+    books = args.books or PRESETS[args.preset]['books']
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    scratch = None
+    if args.database_url:
+        BenchmarkConfig.SQLALCHEMY_DATABASE_URI = args.database_url
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        BenchmarkConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{scratch.name}'
+    config_by_name['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+
+    with app.app_context():
+        started = time.perf_counter()
+        companies = seed(users, books, reset=bool(args.database_url))
+        print(f'Seeded {users:,} users, {companies:,} companies and {books:,} books '
+              f'in {time.perf_counter() - started:.1f}s ({app.config["SQLALCHEMY_DATABASE_URI"]})')
+
+    results = {}
+    drivers = ('client', 'wsgi') if args.driver == 'both' else (args.driver,)
+    print(f"{'scenario':<34} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'queries':>8} {'errors':>7}")
+    try:
+        for name in drivers:
+            driver = TestClientDriver(app) if name == 'client' else WSGIDriver(app)
+            try:
+                available = scenarios(driver, users, books, companies)
+                selected = args.scenarios.split(',') if args.scenarios else list(available)
+                for scenario in selected:
+                    for level in levels:
+                        key = f'{name}/{scenario}/c{level}'
+                        random.seed(key)  # The same requests on every run
+                        result = results[key] = measure(driver, available[scenario], level, args.requests)
+                        print(f"{key:<34} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} "
+                              f"{result['rps']:>9} {result['queries']:>8} {result['errors']:>7}")
+            finally:
+                driver.close()
+    finally:
+        if scratch is not None:
+            os.unlink(scratch.name)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'preset': args.preset, 'books': books, 'users': users, 'results': results}, f,
+                      indent=2, sort_keys=True)
+        print(f'Saved baseline to {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print('No baseline to compare against; run with --save-baseline to store one')
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if (baseline.get('books'), baseline.get('users')) != (books, users):
+        print(f"Baseline was recorded with {baseline.get('books')} books and {baseline.get('users')} users; "
+              'comparing anyway')
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if regressions:
+        sys.exit(1)
+    print('No regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
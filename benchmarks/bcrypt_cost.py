@@ -0,0 +1,39 @@
+"""Report bcrypt logins/sec per core at each work factor.
+
+Usage: python benchmarks/bcrypt_cost.py [--min 8] [--max 14] [--seconds 2]
+"""
+import argparse
+import time
+
+import bcrypt
+
+
+def logins_per_second(cost, seconds):
+    password = b'correct horse battery staple'
+    password_hash = bcrypt.hashpw(password, bcrypt.gensalt(cost))
+    count = 0
+    started = time.perf_counter()
+    while True:
+        bcrypt.checkpw(password, password_hash)
+        count += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--min', type=int, default=8, help='lowest BCRYPT_LOG_ROUNDS to measure')
+    parser.add_argument('--max', type=int, default=14, help='highest BCRYPT_LOG_ROUNDS to measure')
+    parser.add_argument('--seconds', type=float, default=2.0, help='time spent on each cost')
+    args = parser.parse_args()
+
+    # A single thread is one core; multiply by PASSWORD_HASH_WORKERS for pool capacity
+    print(f"{'cost':>4}  {'ms/verify':>10}  {'logins/sec/core':>16}")
+    for cost in range(args.min, args.max + 1):
+        rate = logins_per_second(cost, args.seconds)
+        print(f'{cost:>4}  {1000 / rate:>10.1f}  {rate:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Count SQL statements and time per create request, for new and duplicate rows.
+
+Usage: python benchmarks/create_round_trips.py [--requests 200]
+
+Registers users, companies and books through the test client and reads the
+statement count of each request from the Server-Timing header (failed statements
+included); then repeats each request with a value that violates a unique constraint.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import TestingConfig, config_by_name
+
+
+class BenchmarkConfig(TestingConfig):
+    METRICS_SERVER_TIMING = True
+    SLOW_QUERY_THRESHOLD = None
+
+
+def queries(response):
+    timing = response.headers.get('Server-Timing', '')
+    if 'desc="' not in timing:
+        raise SystemExit(f'No SQL count in the Server-Timing header of a {response.status_code} response')
+    return int(timing.rsplit('desc="', 1)[1].split(' ', 1)[0])
+
+
+def run(client, make_request, requests):
+    counts, statuses = [], {}
+    started = time.perf_counter()
+    for i in range(requests):
+        response = make_request(i)
+        counts.append(queries(response))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+    return sum(counts) / len(counts), elapsed / requests * 1000, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='requests per case')
+    args = parser.parse_args()
+
+    config_by_name['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+    client = app.test_client()
+
+    def register_user(i, email=None):
+        return client.post('/api/v1/auth/register', json={
+            'first_name': 'Bench', 'last_name': str(i), 'email': email or f'user{i}@example.com',
+            'contact': f'c{i}', 'password': 'benchmark', 'user_type': 'author'})
+
+    register_user(-1, 'owner@example.com')
+    token = client.post('/api/v1/auth/login', json={'email': 'owner@example.com', 'password': 'benchmark'})
+    headers = {'Authorization': f"Bearer {token.get_json()['access_token']}"}
+
+    def register_company(i, name=None):
+        return client.post('/api/v1/company/register', headers=headers, json={
+            'name': name or f'Company {i}', 'origin': 'UG', 'description': 'Benchmark company'})
+
+    def register_book(i, isbn=None):
+        return client.post('/api/v1/book/register', headers=headers, json={
+            'title': f'Book {i}', 'description': 'Benchmark book', 'price': 1, 'price_unit': 'UGX', 'pages': 10,
+            'publication_date': '2024-01-01', 'isbn': isbn or f'isbn-{i}', 'genre': 'fiction', 'company_id': 1})
+
+    cases = (
+        ('register user', lambda i: register_user(i)),
+        ('register user (duplicate email)', lambda i: register_user(args.requests + i, 'user0@example.com')),
+        ('register company', lambda i: register_company(i)),
+        ('register company (duplicate name)', lambda i: register_company(i, 'Company 0')),
+        ('register book', lambda i: register_book(i)),
+        ('register book (duplicate isbn)', lambda i: register_book(i, 'isbn-0')),
+    )
+    print(f"{'case':<36} {'queries/request':>16} {'ms/request':>11}  statuses")
+    for name, make_request in cases:
+        average, ms, statuses = run(client, make_request, args.requests)
+        print(f'{name:<36} {average:>16.2f} {ms:>11.3f}  {statuses}')
+
+
+if __name__ == '__main__':
+    main()
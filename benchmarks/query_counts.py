@@ -0,0 +1,87 @@
+"""Check that book list responses run a constant number of SQL queries per page.
+
+Usage: python benchmarks/query_counts.py [--authors 50] [--books 500]
+
+Exits non-zero when the query count grows with the page size, i.e. when an
+N+1 pattern has crept into a list endpoint.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models.books import Book
+from app.models.companies import Company
+from app.models.users import User
+from app.result_cache import result_cache
+
+PAGE_SIZES = (10, 100)
+URLS = ('/api/v1/book/?limit={size}',
+        '/api/v1/book/?limit={size}&expand=author',
+        '/api/v1/book/?limit={size}&expand=author,company',
+        '/api/v1/book/?limit={size}&expand=company&sort=-title')
+
+
+def seed(authors, books):
+    users = [User(first_name='Author', last_name=str(i), email=f'author{i}@example.com', contact=str(i),
+                  password='x', biography='', user_type='author') for i in range(authors)]
+    db.session.add_all(users)
+    db.session.flush()
+    companies = [Company(name=f'Company {i}', origin='UG', description='d', user_id=user.id)
+                 for i, user in enumerate(users)]
+    db.session.add_all(companies)
+    db.session.flush()
+    db.session.execute(db.insert(Book), [{
+        'title': f'Book {i}', 'description': 'A benchmark book', 'price': i, 'price_unit': 'UGX',
+        'publication_date': date(2020, 1, 1), 'isbn': f'isbn-{i}', 'genre': 'bench', 'pages': 100,
+        'user_id': users[i % authors].id, 'company_id': companies[i % authors].id,
+    } for i in range(books)])
+    db.session.commit()
+
+
+def count_queries(client, url):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Cached responses would hide the queries being counted
+    result_cache.invalidate('books', 'users', 'companies')
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200, (url, response.status_code, response.get_json())
+    return len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--authors', type=int, default=50, help='authors (and companies) to seed')
+    parser.add_argument('--books', type=int, default=500, help='books to seed')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    client = app.test_client()
+    failed = False
+    with app.app_context():
+        seed(args.authors, args.books)
+        for url in URLS:
+            counts = [count_queries(client, url.format(size=size)) for size in PAGE_SIZES]
+            constant = len(set(counts)) == 1
+            failed = failed or not constant
+            sizes = ', '.join(f'{size} rows: {count}' for size, count in zip(PAGE_SIZES, counts))
+            print(f"{'ok' if constant else 'FAIL':<5} {url.format(size='N'):<55} queries ({sizes})")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Compare rows/sec of list serialization strategies for books.
+
+Usage: python benchmarks/serializers.py [--rows 20000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+from app.models.books import Book
+from app.models.companies import Company
+from app.models.users import User
+from app.serializers import book_schema
+
+
+def seed(rows):
+    user = User(first_name='Bench', last_name='Mark', email='bench@example.com', contact='0',
+                password='x', biography='', user_type='author')
+    db.session.add(user)
+    db.session.flush()
+    company = Company(name='Bench', origin='UG', description='d', user_id=user.id)
+    db.session.add(company)
+    db.session.flush()
+    db.session.execute(db.insert(Book), [{
+        'title': f'Book {i}', 'description': 'A benchmark book', 'price': i, 'price_unit': 'UGX',
+        'publication_date': date(2020, 1, 1), 'isbn': f'isbn-{i}', 'genre': 'bench', 'pages': 100,
+        'user_id': user.id, 'company_id': company.id,
+    } for i in range(rows)])
+    db.session.commit()
+
+
+def orm_hand_built(app):
+    # What the controllers did before: hydrate every ORM object and build dicts by hand
+    books = Book.query.all()
+    book_list = [{
+        'id': book.id, 'title': book.title, 'description': book.description, 'price': book.price,
+        'price_unit': book.price_unit, 'pages': book.pages,
+        'publication_date': book.publication_date.isoformat(), 'isbn': book.isbn, 'genre': book.genre,
+        'user_id': book.user_id, 'company_id': book.company_id,
+    } for book in books]
+    return json.dumps({'books': book_list})
+
+
+def rows_schema_stdlib(app):
+    rows = db.session.execute(book_schema.select()).all()
+    return json.dumps({'books': book_schema.dump_rows(rows)})
+
+
+def rows_schema_provider(app):
+    rows = db.session.execute(book_schema.select()).all()
+    return app.json.dumps({'books': book_schema.dump_rows(rows)})
+
+
+def measure(app, fn, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn(app)
+        best = min(best, time.perf_counter() - started)
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000, help='books to seed and serialize')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per strategy; the best is reported')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        seed(args.rows)
+        print(f'JSON provider: {type(app.json).__name__}')
+        baseline = None
+        for name, fn in (('ORM objects + hand-built dicts + json', orm_hand_built),
+                         ('Row projection + schema + json', rows_schema_stdlib),
+                         ('Row projection + schema + app.json', rows_schema_provider)):
+            rate = measure(app, fn, args.rows, args.repeat)
+            baseline = baseline or rate
+            print(f'{name:<42} {rate:>12,.0f} rows/sec  ({rate / baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
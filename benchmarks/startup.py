@@ -0,0 +1,55 @@
+"""Report import and app-factory time for a cold worker start.
+
+Usage: python benchmarks/startup.py [--config production] [--runs 10] [--database-url URL]
+
+Each run is a fresh interpreter, like a newly spawned worker. The default database
+URL points at a path that can't be opened, so the factory only succeeds if it
+doesn't touch the database at boot.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app(sys.argv[1])
+finished = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "factory_ms": (finished - imported) * 1000,
+                  "alembic_loaded": "alembic" in sys.modules}))
+'''
+
+
+def run_once(config, database_url):
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='')
+    output = subprocess.run([sys.executable, '-c', PROBE, config], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--config', default='production', help='APP_ENV to start with')
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters to start')
+    parser.add_argument('--database-url', default='sqlite:////nonexistent/authors_api.db',
+                        help='database the app is configured with (never connected to at boot)')
+    args = parser.parse_args()
+
+    runs = [run_once(args.config, args.database_url) for _ in range(args.runs)]
+    for name in ('import_ms', 'factory_ms'):
+        values = [run[name] for run in runs]
+        print(f'{name:<12} median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}')
+    totals = [run['import_ms'] + run['factory_ms'] for run in runs]
+    print(f"{'total_ms':<12} median {statistics.median(totals):8.1f}")
+    print(f"alembic imported at boot: {any(run['alembic_loaded'] for run in runs)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,184 @@
-from app.extensions import db
-from datetime import datetime
+from datetime import datetime, timedelta
+import os
 class Config:
-    SQLALCHEMY_DATABASE_URI = 'mysql+pymysql://root:@localhost/authors_api'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'mysql+pymysql://root:@localhost/authors_api')
+
+    # Connection pool; size it so pool_size + max_overflow covers the threads of one worker.
+    # pool_recycle stays below MySQL's wait_timeout and pre-ping drops stale connections.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    }
+
+    # Create missing tables at startup. Production leaves the schema to `flask db upgrade`
+    # (verify it with `flask schema check`), so starting a worker issues no DDL.
+    SCHEMA_AUTO_CREATE = False
+
+    # Read replicas for GET requests, comma separated. Replicas lagging more than
+    # REPLICA_MAX_LAG seconds are skipped, and clients read from the primary for
+    # REPLICA_READ_YOUR_WRITES_WINDOW seconds after a write.
+    READ_REPLICA_URLS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+    REPLICA_MAX_LAG = 5
+    REPLICA_LAG_CHECK_INTERVAL = 10
+    REPLICA_READ_YOUR_WRITES_WINDOW = 5
+
+    # Access tokens carry role claims, so role changes apply once the token is refreshed
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    # Serialize responses with orjson when the package is installed
+    JSON_USE_ORJSON = True
+
+    # Keyset pagination for list endpoints
+    PAGINATION_DEFAULT_PAGE_SIZE = 50
+    PAGINATION_MAX_PAGE_SIZE = 200
+
+    # Rows fetched per round trip when streaming NDJSON exports
+    EXPORT_YIELD_PER = 1000
+
+    # Cache-Control max-age for public GET responses (ETags are always sent)
+    HTTP_CACHE_MAX_AGE = 60
+
+    # Compress buffered responses of these types above COMPRESS_MIN_SIZE bytes with
+    # brotli (when installed) or gzip, whichever the client prefers
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+    COMPRESS_MIMETYPES = ('application/json', 'text/plain', 'text/html')
+
+    # Server-side result cache for book and company reads: 'memory' (per process LRU),
+    # 'redis' (shared across workers, needs the redis package and RESULT_CACHE_URL) or 'none'
+    RESULT_CACHE_BACKEND = os.environ.get('RESULT_CACHE_BACKEND', 'memory')
+    RESULT_CACHE_URL = os.environ.get('RESULT_CACHE_URL', 'redis://localhost:6379/0')
+    RESULT_CACHE_TTL = 30
+    RESULT_CACHE_MAX_ENTRIES = 2048
+
+    # Book search index: 'mysql' (FULLTEXT), 'memory' (in-process BM25) or 'auto'
+    SEARCH_BACKEND = 'auto'
+
+    # Revoked token checks: seconds between incremental loads from revoked_tokens (reaching
+    # RELOAD_OVERLAP seconds back for late commits) and between full rebuilds, Bloom filter
+    # in front of the jti index, and how often expired rows are purged
+    REVOKED_TOKEN_CACHE_TTL = 30
+    REVOKED_TOKEN_RELOAD_OVERLAP = 60
+    REVOKED_TOKEN_REBUILD_INTERVAL = 3600
+    REVOKED_TOKEN_CACHE_SIZE = 1024
+    REVOKED_TOKEN_BLOOM_FILTER = True
+    REVOKED_TOKEN_BLOOM_ERROR_RATE = 0.01
+    REVOKED_TOKEN_PURGE_INTERVAL = 3600
+
+    # Per-process cache of the current user's authorization fields
+    CURRENT_USER_CACHE_TTL = 60
+    CURRENT_USER_CACHE_SIZE = 1024
+
+    # bcrypt work factor; hashes with a different cost are upgraded on the next login
+    BCRYPT_LOG_ROUNDS = 12
+    # Processes hashing passwords off the request threads (0 hashes inline),
+    # how many operations may be queued, and how long a request waits for one
+    PASSWORD_HASH_WORKERS = os.cpu_count() or 1
+    PASSWORD_HASH_QUEUE_SIZE = 64
+    PASSWORD_HASH_TIMEOUT = 10
+
+    # Sliding-window rate limits per endpoint, keyed by client IP, the 'email' of the
+    # JSON body or the JWT identity. 'memory' counts per process; 'redis' shares the
+    # counters between workers (needs the redis package and RATE_LIMIT_STORAGE_URL).
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL', 'redis://localhost:6379/1')
+    RATE_LIMIT_MAX_KEYS = 10000
+    RATE_LIMITS = {
+        'auth.login': {'ip': '20/minute', 'email': '5/minute'},
+        'auth.register': {'ip': '10/hour'},
+        'auth.refresh': {'identity': '30/minute'},
+        'auth.update_user': {'identity': '10/minute'},
+        'book.bulk_register_books': {'identity': '10/minute'},
+        'book.search_books': {'ip': '120/minute'},
+    }
+
+    # Request/SQL metrics at /metrics; queries slower than SLOW_QUERY_THRESHOLD seconds are
+    # logged to the 'app.sql' logger (None disables). METRICS_SERVER_TIMING adds a
+    # Server-Timing header with the request's SQL count and time.
+    METRICS_ENABLED = True
+    SLOW_QUERY_THRESHOLD = 0.5
+    METRICS_SERVER_TIMING = False
+
+    # Registration checks email syntax offline. With EMAIL_CHECK_DELIVERABILITY the domain's
+    # DNS records are looked up in the background and cached (negative answers for less
+    # time); only domains already known not to accept mail are refused.
+    EMAIL_CHECK_DELIVERABILITY = os.environ.get('EMAIL_CHECK_DELIVERABILITY', '0') == '1'
+    EMAIL_DNS_TIMEOUT = 5
+    EMAIL_DNS_WORKERS = 2
+    EMAIL_DOMAIN_CACHE_TTL = 86400
+    EMAIL_DOMAIN_NEGATIVE_CACHE_TTL = 3600
+    EMAIL_DOMAIN_CACHE_SIZE = 10000
+
+    # Bulk book import: rows accepted per request and rows per insert transaction
+    BULK_IMPORT_MAX_ROWS = 10000
+    BULK_IMPORT_CHUNK_SIZE = 500
+
+    # Deleting a user or company with more books than this returns 202 and runs as a
+    # background job, removing DELETE_BATCH_SIZE books per transaction
+    DELETE_ASYNC_THRESHOLD = 10000
+    DELETE_BATCH_SIZE = 1000
+
+    # Change feeds (/api/v1/book/changes, /api/v1/company/changes) stop this many seconds in
+    # the past so late commits aren't skipped; keep it above REPLICA_MAX_LAG. Deletions are
+    # kept as tombstones for SYNC_TOMBSTONE_RETENTION_DAYS (`flask purge-tombstones`).
+    SYNC_SETTLE_SECONDS = 10
+    SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+    # Background jobs (`flask jobs worker`): attempts before a job fails, exponential
+    # backoff between attempts, and seconds before a running job's lock is presumed dead.
+    # JOBS_EMBEDDED_WORKER runs a worker thread inside the web process instead.
+    JOBS_MAX_ATTEMPTS = 5
+    JOBS_BACKOFF_BASE = 2
+    JOBS_BACKOFF_MAX = 300
+    JOBS_LOCK_TIMEOUT = 600
+    JOBS_POLL_INTERVAL = 1
+    JOBS_EMBEDDED_WORKER = os.environ.get('JOBS_EMBEDDED_WORKER', '0') == '1'
+
+
+class DevelopmentConfig(Config):
+    SCHEMA_AUTO_CREATE = True
+    METRICS_SERVER_TIMING = True
+    JOBS_EMBEDDED_WORKER = os.environ.get('JOBS_EMBEDDED_WORKER', '1') == '1'
+    SQLALCHEMY_ENGINE_OPTIONS = dict(Config.SQLALCHEMY_ENGINE_OPTIONS,
+                                     pool_size=int(os.environ.get('DB_POOL_SIZE', 5)))
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SCHEMA_AUTO_CREATE = True
+    # In-memory SQLite uses a single static connection, so no pool options apply
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite://')
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    READ_REPLICA_URLS = []
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    RATE_LIMIT_ENABLED = False
+    SYNC_SETTLE_SECONDS = 0
+
+
+class ProductionConfig(Config):
+    SQLALCHEMY_ENGINE_OPTIONS = dict(Config.SQLALCHEMY_ENGINE_OPTIONS,
+                                     pool_size=int(os.environ.get('DB_POOL_SIZE', 20)),
+                                     max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)))
+
+
+# Selected through APP_ENV in create_app
+config_by_name = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
+}
 # config.py
 
 # Secret key for encoding and decoding JWTs
 JWT_SECRET_KEY = 'your-secret-key'
 
 # Token expiration time (for example, set to 15 minutes)
-JWT_ACCESS_TOKEN_EXPIRES = 900  # 15 minutes in seconds
\ No newline at end of file
+JWT_ACCESS_TOKEN_EXPIRES = 900  # 15 minutes in seconds
@@ -0,0 +1,83 @@
+"""initial schema
+
+Revision ID: 4f1c2a9d7e10
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1c2a9d7e10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('first_name', sa.String(length=100), nullable=False),
+    sa.Column('last_name', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('contact', sa.String(length=50), nullable=False),
+    sa.Column('image', sa.String(length=225), nullable=True),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('biography', sa.Text(), nullable=True),
+    sa.Column('user_type', sa.String(length=20), nullable=True),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('contact'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('companies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('origin', sa.String(length=100), nullable=True),
+    sa.Column('description', sa.String(length=200), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # users <-> companies reference each other, so this key is added once both exist
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_foreign_key('users_company_id_fkey', 'companies', ['company_id'], ['id'])
+    op.create_table('books',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.String(length=150), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=True),
+    sa.Column('price_unit', sa.String(length=10), nullable=False),
+    sa.Column('publication_date', sa.Date(), nullable=False),
+    sa.Column('isbn', sa.String(length=30), nullable=False),
+    sa.Column('genre', sa.String(length=50), nullable=False),
+    sa.Column('pages', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('isbn')
+    )
+    op.create_table('revoked_tokens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(length=120), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('revoked_tokens')
+    op.drop_table('books')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_constraint('users_company_id_fkey', type_='foreignkey')
+    op.drop_table('companies')
+    op.drop_table('users')
@@ -0,0 +1,30 @@
+"""index revoked token jti and track expiry
+
+Revision ID: 5a9e0b7c3d21
+Revises: c2d7a4e9f013
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9e0b7c3d21'
+down_revision = 'c2d7a4e9f013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_revoked_tokens_jti'), ['jti'], unique=True)
+        batch_op.create_index(batch_op.f('ix_revoked_tokens_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_revoked_tokens_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_revoked_tokens_jti'))
+        batch_op.drop_column('expires_at')
@@ -0,0 +1,36 @@
+"""add book filter indexes
+
+Revision ID: 8b3e5d21c6f4
+Revises: 4f1c2a9d7e10
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3e5d21c6f4'
+down_revision = '4f1c2a9d7e10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.create_index('ix_books_genre_publication_date', ['genre', 'publication_date'], unique=False)
+        batch_op.create_index('ix_books_company_id_id', ['company_id', 'id'], unique=False)
+        batch_op.create_index('ix_books_user_id_id', ['user_id', 'id'], unique=False)
+        batch_op.create_index('ix_books_publication_date_id', ['publication_date', 'id'], unique=False)
+        batch_op.create_index('ix_books_title_id', ['title', 'id'], unique=False)
+        batch_op.create_index('ix_books_price', ['price'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_index('ix_books_price')
+        batch_op.drop_index('ix_books_title_id')
+        batch_op.drop_index('ix_books_publication_date_id')
+        batch_op.drop_index('ix_books_user_id_id')
+        batch_op.drop_index('ix_books_company_id_id')
+        batch_op.drop_index('ix_books_genre_publication_date')
@@ -0,0 +1,50 @@
+"""index updated_at for change feeds and add the tombstones table
+
+Revision ID: a3d5f7c9e186
+Revises: f1a6c8d3e254
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d5f7c9e186'
+down_revision = 'f1a6c8d3e254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows never updated have no updated_at yet; the feed reads them from their creation time
+    for table in ('books', 'companies'):
+        op.execute(f'UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL')
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.create_index('ix_books_updated_at_id', ['updated_at', 'id'], unique=False)
+
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.create_index('ix_companies_updated_at_id', ['updated_at', 'id'], unique=False)
+
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_tombstones_table_name_deleted_at_id', ['table_name', 'deleted_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_tombstones_table_name_deleted_at_id')
+    op.drop_table('tombstones')
+
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.drop_index('ix_companies_updated_at_id')
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_index('ix_books_updated_at_id')
@@ -0,0 +1,29 @@
+"""record when each token revocation was made
+
+Revision ID: b6e2d8f4a913
+Revises: a3d5f7c9e186
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2d8f4a913'
+down_revision = 'a3d5f7c9e186'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revoked_at', sa.DateTime(), nullable=True))
+
+    # Deleted-user rows revoke tokens issued up to this time; existing rows count from now
+    op.execute('UPDATE revoked_tokens SET revoked_at = CURRENT_TIMESTAMP WHERE revoked_at IS NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.drop_column('revoked_at')
@@ -0,0 +1,26 @@
+"""add book fulltext index
+
+Revision ID: c2d7a4e9f013
+Revises: 8b3e5d21c6f4
+Create Date: 2026-10-18 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d7a4e9f013'
+down_revision = '8b3e5d21c6f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.create_index('ix_books_fulltext', ['title', 'description', 'genre'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_index('ix_books_fulltext')
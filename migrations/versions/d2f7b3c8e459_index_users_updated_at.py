@@ -0,0 +1,29 @@
+"""set users.updated_at on insert and index it
+
+Revision ID: d2f7b3c8e459
+Revises: c9a4e6b2d718
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7b3c8e459'
+down_revision = 'c9a4e6b2d718'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Users never updated have no updated_at yet; Last-Modified reads it from their creation time
+    op.execute('UPDATE users SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_updated_at'))
@@ -0,0 +1,51 @@
+"""cascade company deletes to books and detach members
+
+Revision ID: d4b8e1f27a65
+Revises: 5a9e0b7c3d21
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8e1f27a65'
+down_revision = '5a9e0b7c3d21'
+branch_labels = None
+depends_on = None
+
+# Gives the unnamed company_id keys a name SQLite's batch mode can drop
+naming_convention = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def foreign_key_name(table, column):
+    # Databases created with create_all left these keys unnamed, so MySQL generated one (books_ibfk_N)
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if fk['constrained_columns'] == [column]:
+            return fk['name'] or f'{table}_{column}_fkey'
+    return f'{table}_{column}_fkey'
+
+
+def upgrade():
+    books_fk = foreign_key_name('books', 'company_id')
+    with op.batch_alter_table('books', schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint(books_fk, type_='foreignkey')
+        batch_op.create_foreign_key('books_company_id_fkey', 'companies', ['company_id'], ['id'],
+                                    ondelete='CASCADE')
+
+    users_fk = foreign_key_name('users', 'company_id')
+    with op.batch_alter_table('users', schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint(users_fk, type_='foreignkey')
+        batch_op.create_foreign_key('users_company_id_fkey', 'companies', ['company_id'], ['id'],
+                                    ondelete='SET NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_constraint('users_company_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('users_company_id_fkey', 'companies', ['company_id'], ['id'])
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_constraint('books_company_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('books_company_id_fkey', 'companies', ['company_id'], ['id'])
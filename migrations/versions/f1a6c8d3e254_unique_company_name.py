@@ -0,0 +1,27 @@
+"""add a unique index on companies.name
+
+Revision ID: f1a6c8d3e254
+Revises: e7c3a9b5d102
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a6c8d3e254'
+down_revision = 'e7c3a9b5d102'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fails if existing rows share a name; rename or merge those companies first
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.create_index('ix_companies_name', ['name'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.drop_index('ix_companies_name')